@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,6 +93,39 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open across requests, checked before reuse.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))),
+    }
+}
+
+# Bounded pool of connections per worker process, enabled with DB_POOL_SIZE.
+# Connections go back to the pool after each request, and a request waits
+# up to DB_POOL_TIMEOUT seconds for one when all of them are in use.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+if DB_POOL_SIZE:
+    DATABASES['default'].update({
+        'ENGINE': 'core.db.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_AGE': int(os.environ.get('DB_POOL_MAX_AGE', 60 * 60)),
+            'CHECK_IDLE': int(os.environ.get('DB_POOL_CHECK_IDLE', 30)),
+        },
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -137,6 +171,22 @@ MEDIA_URL = '/static/media/'
 
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
+# State kept by the boot command between container starts, not served.
+BOOT_STATE_DIR = os.environ.get('BOOT_STATE_DIR', '/vol/state')
+
+# ManifestStaticFilesStorage in production, whose hashed names the proxy
+# serves as immutable.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': os.environ.get(
+            'STATICFILES_BACKEND',
+            'django.contrib.staticfiles.storage.StaticFilesStorage',
+        ),
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -147,8 +197,59 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Pagination is set per view set, PAGE_SIZE is only the default page size.
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
+
+# Tag/ingredient to recipe IDs index used to answer recipe filters.
+RECIPE_INDEX_ENABLED = bool(int(os.environ.get('RECIPE_INDEX_ENABLED', 1)))
+RECIPE_INDEX_TIMEOUT = int(os.environ.get('RECIPE_INDEX_TIMEOUT', 60 * 60 * 24))
+# Larger ID sets are filtered with EXISTS semi-joins instead of an IN list.
+RECIPE_INDEX_MAX_IDS = int(os.environ.get('RECIPE_INDEX_MAX_IDS', 1000))
+
+# Per-user versioned cache of list responses.
+RESPONSE_CACHE_ENABLED = bool(int(os.environ.get('RESPONSE_CACHE_ENABLED', 1)))
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60 * 10))
+
+# Seconds an API token to user lookup is kept in the cache.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+# Resized recipe image renditions, generated by a per-process thread pool.
+IMAGE_RENDITIONS_ASYNC = bool(int(os.environ.get('IMAGE_RENDITIONS_ASYNC', 1)))
+IMAGE_RENDITION_WORKERS = int(os.environ.get('IMAGE_RENDITION_WORKERS', 2))
+IMAGE_RENDITION_QUALITY = int(os.environ.get('IMAGE_RENDITION_QUALITY', 80))
+
+# Resumable chunked image uploads.
+CHUNKED_UPLOAD_ROOT = os.environ.get('CHUNKED_UPLOAD_ROOT', '/vol/web/chunks')
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 1024 * 1024))
+CHUNKED_UPLOAD_EXPIRY = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY', 60 * 60 * 24))
+
+# Precomputed OpenAPI schema, served from memory instead of being generated
+# per request. Off by default in development so code changes show up at once.
+SCHEMA_CACHE_ENABLED = bool(int(os.environ.get('SCHEMA_CACHE_ENABLED', 0 if DEBUG else 1)))
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', os.path.join(BASE_DIR, '.schema'))
+
+# Server-Timing headers on every response, and cProfile dumps of a sampled
+# fraction of requests or of those sending the secret in X-Profile.
+PROFILING_ENABLED = bool(int(os.environ.get('PROFILING_ENABLED', 0)))
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SECRET = os.environ.get('PROFILING_SECRET', '')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', '/vol/web/profiles')
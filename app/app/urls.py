@@ -15,16 +15,19 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import CachedSchemaView, DatabaseStatusView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/schema/', CachedSchemaView.as_view(), name='api-schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
     path('api/users/', include("user.urls")),
     path('api/recipes/', include("recipe.urls")),
+    path('api/status/db/', DatabaseStatusView.as_view(), name='db-status'),
 ]
 
 if settings.DEBUG:
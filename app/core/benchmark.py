@@ -0,0 +1,138 @@
+"""
+Microbenchmarks of the API endpoints
+
+Every case is a callable issuing one logical request through the test
+client. It is timed over a number of iterations, with its SQL queries
+counted by an execute wrapper, then run once more under tracemalloc for
+its peak memory. Results are compared against a committed baseline:
+query counts must not grow, timings and memory may grow by a tolerance,
+with a looser one for the noisy p99. Timings and memory are only compared
+when the baseline holds them for the same database, dataset and host.
+"""
+import gc
+import itertools
+import math
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+
+# Differences below these are noise whatever the tolerance.
+TIME_NOISE_FLOOR_MS = 1.0
+MEMORY_NOISE_FLOOR_KIB = 16
+
+
+class RequestFailed(Exception):
+    """A benchmarked request did not succeed."""
+
+
+class QueryCounter:
+    """Execute wrapper counting the queries run through a connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def describe_host():
+    """Return a description of the machine the benchmark runs on"""
+    return f'{platform.machine()}, {os.cpu_count()} CPUs, Python {platform.python_version()}'
+
+
+def queries_only(results):
+    """Return results keeping only the query count of each case"""
+    return {
+        'dataset': results['dataset'],
+        'cases': {name: {'queries': result['queries']} for name, result in results['cases'].items()},
+    }
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of some values"""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+
+    return ordered[rank - 1]
+
+
+def _run(name, request, i):
+    response = request(i)
+    if response.status_code >= 400:
+        raise RequestFailed(f'{name} returned {response.status_code}: {response.content[:200]!r}')
+
+
+def measure(name, request, iterations, warmup=1):
+    """Time a case and return its query count, latencies and peak memory"""
+    counter = itertools.count()
+    for _ in range(warmup):
+        _run(name, request, next(counter))
+
+    gc.collect()
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        query_counter = QueryCounter()
+        with connection.execute_wrapper(query_counter):
+            started = time.perf_counter()
+            _run(name, request, next(counter))
+            timings.append(time.perf_counter() - started)
+        queries = max(queries, query_counter.count)
+
+    tracemalloc.start()
+    try:
+        _run(name, request, next(counter))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'queries': queries,
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'wall_s': round(sum(timings), 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(baseline, results, tolerance, tail_tolerance):
+    """Return the regressions of some results against a baseline, and notes on what was not compared"""
+    regressions = []
+    notes = []
+    same_setup = all(baseline.get(key) == results.get(key) for key in ('vendor', 'dataset', 'host'))
+    if 'vendor' not in baseline:
+        same_setup = False
+        notes.append('Baseline only holds query counts, only query counts are compared.')
+    elif not same_setup:
+        notes.append('Baseline was recorded on another database, dataset or host, only query counts are compared.')
+
+    for name, result in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            notes.append(f'{name}: not in the baseline.')
+            continue
+
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: {result['queries']} queries, baseline {base['queries']}")
+        if not same_setup:
+            continue
+
+        for metric, allowed, floor in (
+            ('p50_ms', tolerance, TIME_NOISE_FLOOR_MS),
+            ('p99_ms', tail_tolerance, TIME_NOISE_FLOOR_MS),
+            ('peak_kib', tolerance, MEMORY_NOISE_FLOOR_KIB),
+        ):
+            limit = base[metric] * (1 + allowed)
+            if result[metric] > limit and result[metric] - base[metric] > floor:
+                regressions.append(f'{name}: {metric} {result[metric]}, baseline {base[metric]}')
+
+    for name in baseline['cases'].keys() - results['cases'].keys():
+        notes.append(f'{name}: in the baseline but not run.')
+
+    return regressions, notes
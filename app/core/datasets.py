@@ -0,0 +1,339 @@
+"""
+Synthetic datasets for the seed, benchmark and index audit commands
+
+Rows are generated as plain tuples with their primary keys reserved up
+front, then loaded with COPY on PostgreSQL or batched INSERTs elsewhere:
+no model instances, signals or per-user password hashing. Tags and
+ingredients are picked with Zipfian popularity, and every recipe gets a
+variable number of each. On PostgreSQL the recipe search vector trigger
+is disabled during the load and the vectors are computed by one UPDATE.
+"""
+import bisect
+import gc
+import io
+import itertools
+import random
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag
+
+# Recipes generated and loaded at a time, bounding memory use.
+BATCH_SIZE = 10000
+# Weighted picks are made from tables indexed by random 16-bit integers.
+LOOKUP_TABLE_SIZE = 1 << 16
+
+ADJECTIVES = (
+    'Classic', 'Spicy', 'Creamy', 'Quick', 'Roasted', 'Grilled', 'Smoky', 'Crispy',
+    'Vegan', 'Easy', 'Lemon', 'Garlic', 'Honey', 'Rustic', 'Summer', 'Winter',
+)
+DISHES = (
+    'chicken curry', 'tomato soup', 'beef stew', 'mushroom risotto', 'pancakes',
+    'lentil salad', 'fish tacos', 'lasagna', 'pad thai', 'chili', 'banana bread',
+    'ramen', 'falafel', 'shakshuka', 'paella', 'apple pie', 'stir fry', 'burrito',
+)
+TEXTS = [
+    (f'{adjective} {dish}', f'A {adjective.lower()} take on {dish}.')
+    for adjective in ADJECTIVES
+    for dish in DISHES
+]
+MINUTES = (5, 10, 15, 20, 25, 30, 40, 45, 60, 75, 90, 120, 180, 240)
+MINUTES_WEIGHTS = (2, 6, 10, 12, 10, 14, 10, 9, 11, 5, 4, 4, 2, 1)
+PRICES = [f'{cents // 100}.{cents % 100:02d}' for cents in range(150, 4001)]
+TAG_COUNTS = (0, 1, 2, 3, 4, 5, 6)
+TAG_COUNTS_WEIGHTS = (4, 14, 24, 24, 17, 10, 7)
+INGREDIENT_COUNTS = tuple(range(3, 21))
+INGREDIENT_COUNTS_WEIGHTS = (2, 5, 8, 10, 10, 9, 9, 8, 7, 6, 5, 4, 3, 3, 2, 2, 1, 1)
+
+# The recipe search vector as computed by its trigger, see migration 0010.
+SEARCH_TRIGGER = 'core_recipe_search_vector_trigger'
+SEARCH_INDEX = 'core_recipe_search_idx'
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config='pg_catalog.english')
+    + SearchVector('description', weight='B', config='pg_catalog.english')
+)
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def lookup_table(population, weights=None):
+    """Return a table of LOOKUP_TABLE_SIZE items of a population, each repeated in proportion to its weight
+
+    Items whose weight is under one slot may not appear at all.
+    """
+    cum_weights = list(itertools.accumulate(weights or itertools.repeat(1, len(population))))
+    step = cum_weights[-1] / LOOKUP_TABLE_SIZE
+
+    return [
+        population[min(bisect.bisect_right(cum_weights, (i + 0.5) * step), len(population) - 1)]
+        for i in range(LOOKUP_TABLE_SIZE)
+    ]
+
+
+def zipf_table(n, exponent):
+    """Return a lookup table of the indexes of n items, item k weighing 1 / (k + 1)**exponent"""
+    if not n:
+        return []
+
+    return lookup_table(range(n), [1 / rank ** exponent for rank in range(1, n + 1)])
+
+
+def sample(rng, table, k):
+    """Pick k items of a lookup table with replacement, indexing it with random 16-bit integers"""
+    return list(map(table.__getitem__, memoryview(rng.randbytes(2 * k)).cast('H')))
+
+
+def _copy_value(value):
+    if value.__class__ is int:
+        return str(value)
+    if value.__class__ is str:
+        if '\\' in value or '\t' in value or '\n' in value or '\r' in value:
+            return value.translate(COPY_ESCAPES)
+        return value
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    return str(value)
+
+
+def _columns(model, fields):
+    quote = connection.ops.quote_name
+
+    return ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+
+
+def _copy(model, fields, lines):
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({_columns(model, fields)}) FROM STDIN',
+            io.StringIO(''.join(lines)),
+        )
+
+
+def _insert_many(model, fields, rows):
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({_columns(model, fields)}) '
+            f'VALUES ({placeholders})',
+            rows,
+        )
+
+
+def reserve_ids(model, count):
+    """Reserve a block of `count` primary keys of a model and return the first"""
+    table = model._meta.db_table
+    quoted = connection.ops.quote_name(table)
+    pk = model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Held until the end of the transaction, so no insert can draw
+            # from the sequence between nextval and setval.
+            cursor.execute(f'LOCK TABLE {quoted} IN SHARE ROW EXCLUSIVE MODE')
+            cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s))', [table, pk])
+            first = cursor.fetchone()[0]
+            if count > 1:
+                cursor.execute('SELECT setval(pg_get_serial_sequence(%s, %s), %s)', [table, pk, first + count - 1])
+        else:
+            cursor.execute(f'SELECT MAX({connection.ops.quote_name(pk)}) FROM {quoted}')
+            first = (cursor.fetchone()[0] or 0) + 1
+
+    return first
+
+
+def _copy_lines(rows):
+    columns = []
+    for values in zip(*rows):
+        try:
+            # Columns mostly repeat a few values, each converted once.
+            converted = {value: _copy_value(value) for value in set(values)}
+        except TypeError:
+            columns.append(list(map(_copy_value, values)))
+        else:
+            columns.append(list(map(converted.__getitem__, values)))
+
+    return [line + '\n' for line in map('\t'.join, zip(*columns))]
+
+
+def insert(model, fields, rows):
+    """Load rows of field values into the table of a model"""
+    if not rows:
+        return
+
+    if connection.vendor == 'postgresql':
+        _copy(model, fields, _copy_lines(rows))
+    else:
+        _insert_many(model, fields, rows)
+
+
+def insert_links(model, fields, pks, counts, picks, first_related):
+    """Link each of `pks` to its count of the picked related indexes, index 0 being the `first_related` pk"""
+    lines = []
+    rows = []
+    copy = connection.vendor == 'postgresql'
+    related_pks = [str(first_related + i) for i in range(max(picks, default=-1) + 1)]
+    position = 0
+    for pk, count in zip(pks, counts):
+        # Drawing popular items twice leaves some recipes with fewer.
+        related = set(picks[position:position + count])
+        position += count
+        if not related:
+            continue
+        if copy:
+            prefix = f'{pk}\t'
+            lines.append(prefix + f'\n{prefix}'.join(map(related_pks.__getitem__, related)) + '\n')
+        else:
+            rows.extend(zip(itertools.repeat(pk), map(first_related.__add__, related)))
+
+    if lines:
+        _copy(model, fields, lines)
+    if rows:
+        _insert_many(model, fields, rows)
+
+
+def seed(users=5, recipes=2000, tags=200, ingredients=500, zipf=1.1, seed=0, password=None):
+    """Load `users` users owning `recipes`, `tags` and `ingredients` each, and return the users"""
+    # Collections would rescan the growing batches of rows for nothing.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _seed(users, recipes, tags, ingredients, zipf, seed, password)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _seed(users, recipes, tags, ingredients, zipf, seed, password):
+    User = get_user_model()
+    if not users:
+        return User.objects.none()
+
+    rng = random.Random(seed)
+    prefix = uuid.uuid4().hex[:8]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    tag_table = zipf_table(tags, zipf)
+    ingredient_table = zipf_table(ingredients, zipf)
+    text_table = lookup_table(TEXTS)
+    minutes_table = lookup_table(MINUTES, MINUTES_WEIGHTS)
+    price_table = lookup_table(PRICES)
+    tag_count_table = lookup_table(TAG_COUNTS, TAG_COUNTS_WEIGHTS)
+    ingredient_count_table = lookup_table(INGREDIENT_COUNTS, INGREDIENT_COUNTS_WEIGHTS)
+
+    # One hash shared by every user; None gives an unusable password.
+    password_hash = make_password(password)
+    first_user = reserve_ids(User, users)
+    insert(User, ('id', 'password', 'is_superuser', 'email', 'name', 'is_active', 'is_staff'), [
+        (first_user + i, password_hash, False, f'seed-{prefix}-{i}@example.com', f'User {i}', True, False)
+        for i in range(users)
+    ])
+
+    first_tag = reserve_ids(Tag, users * tags) if tags else 0
+    first_ingredient = reserve_ids(Ingredient, users * ingredients) if ingredients else 0
+    first_recipe = reserve_ids(Recipe, users * recipes) if recipes else 0
+    search = connection.vendor == 'postgresql' and recipes
+    if search:
+        # Rebuilding the index is only cheaper than growing it for a table
+        # mostly seeded now, the reserved IDs bound the rows already there.
+        rebuild_index = users * recipes >= first_recipe - 1
+        suspend_search_vectors(rebuild_index)
+    recipe_fields = (
+        'id', 'user', 'title', 'description', 'time_minutes', 'price', 'link', 'image',
+        'image_renditions', 'updated_at',
+    )
+
+    for u in range(users):
+        user_id = first_user + u
+        user_first_tag = first_tag + u * tags
+        user_first_ingredient = first_ingredient + u * ingredients
+        insert(Tag, ('id', 'name', 'user', 'updated_at'), [
+            (user_first_tag + i, f'Tag {i}', user_id, now) for i in range(tags)
+        ])
+        insert(Ingredient, ('id', 'name', 'user', 'updated_at'), [
+            (user_first_ingredient + i, f'Ingredient {i}', user_id, now) for i in range(ingredients)
+        ])
+
+        for start in range(0, recipes, BATCH_SIZE):
+            count = min(BATCH_SIZE, recipes - start)
+            batch_first = first_recipe + u * recipes + start
+            ids = range(batch_first, batch_first + count)
+            texts = sample(rng, text_table, count)
+            insert(Recipe, recipe_fields, list(zip(
+                ids,
+                itertools.repeat(user_id),
+                [title for title, _ in texts],
+                [description for _, description in texts],
+                sample(rng, minutes_table, count),
+                sample(rng, price_table, count),
+                itertools.repeat(''),
+                itertools.repeat(None),
+                itertools.repeat('{}'),
+                itertools.repeat(now),
+            )))
+
+            if tags:
+                tag_counts = sample(rng, tag_count_table, count)
+                picks = sample(rng, tag_table, sum(tag_counts))
+                insert_links(Recipe.tags.through, ('recipe', 'tag'), ids, tag_counts, picks, user_first_tag)
+            if ingredients:
+                ingredient_counts = sample(rng, ingredient_count_table, count)
+                picks = sample(rng, ingredient_table, sum(ingredient_counts))
+                insert_links(
+                    Recipe.ingredients.through,
+                    ('recipe', 'ingredient'),
+                    ids,
+                    ingredient_counts,
+                    picks,
+                    user_first_ingredient,
+                )
+
+    if search:
+        resume_search_vectors(first_recipe, first_recipe + users * recipes - 1, rebuild_index)
+    analyze()
+
+    return User.objects.filter(pk__gte=first_user, pk__lt=first_user + users).order_by('pk')
+
+
+def _search_index():
+    return next(index for index in Recipe._meta.indexes if index.name == SEARCH_INDEX)
+
+
+def suspend_search_vectors(drop_index):
+    """Stop maintaining the recipe search vectors on PostgreSQL, and their index if `drop_index`
+
+    Both are back at the end of the transaction at the latest, which keeps
+    the recipe table locked exclusively until then.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(Recipe._meta.db_table)} DISABLE TRIGGER {quote(SEARCH_TRIGGER)}')
+    if drop_index:
+        with connection.schema_editor() as editor:
+            editor.remove_index(Recipe, _search_index())
+
+
+def resume_search_vectors(first, last, create_index):
+    """Compute the search vectors of the recipes with IDs `first` to `last`, and maintain them again"""
+    quote = connection.ops.quote_name
+    Recipe.objects.filter(pk__range=(first, last)).update(search_vector=SEARCH_VECTOR)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(Recipe._meta.db_table)} ENABLE TRIGGER {quote(SEARCH_TRIGGER)}')
+    if create_index:
+        with connection.schema_editor() as editor:
+            editor.add_index(Recipe, _search_index())
+
+
+def analyze():
+    """Refresh the PostgreSQL planner statistics of the seeded tables"""
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for model in (get_user_model(), Tag, Ingredient, Recipe, Recipe.tags.through, Recipe.ingredients.through):
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
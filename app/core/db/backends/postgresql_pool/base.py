@@ -0,0 +1,49 @@
+"""
+PostgreSQL backend taking its connections from a bounded per-process pool.
+
+Closing a connection gives it back to the pool instead, so run it with
+CONN_MAX_AGE = 0: every request returns its connection when it finishes.
+"""
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper with pooled connections."""
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        try:
+            return self.pool.acquire(lambda: connect(conn_params), check=self._check_connection)
+        except PoolTimeout as exc:
+            raise OperationalError(str(exc)) from exc
+
+    def _check_connection(self, connection):
+        """Return whether an idle raw connection still answers"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        with self.wrap_database_errors:
+            reusable = not self.connection.closed and not self.errors_occurred
+            if reusable and self.connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    self.connection.rollback()
+                except base.Database.Error:
+                    reusable = False
+            self.pool.release(self.connection, reusable)
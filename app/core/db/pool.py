@@ -0,0 +1,146 @@
+"""
+Bounded pool of database connections, shared by the threads of a process.
+"""
+import collections
+import threading
+import time
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection was freed within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    At most `size` connections are open at once. Released connections stay
+    idle until reused, newest first, and are closed once older than
+    `max_age` seconds. Connections idle for more than `check_idle` seconds
+    are checked before reuse.
+    """
+
+    def __init__(self, size, timeout=10, max_age=None, check_idle=None):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_idle = check_idle
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = collections.deque()
+        self._created_at = {}
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.timeouts = 0
+
+    def acquire(self, connect, check=None):
+        """Return an idle connection, or a new one from `connect()`, waiting for a free slot"""
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f'No database connection freed up within {self.timeout} seconds.')
+
+        try:
+            connection = self._reuse(check)
+            if connection is None:
+                connection = connect()
+                with self._lock:
+                    self._created_at[id(connection)] = time.monotonic()
+                    self.created += 1
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.in_use += 1
+
+        return connection
+
+    def _reuse(self, check):
+        """Pop the newest idle connection still worth reusing"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, released_at = self._idle.pop()
+
+            expired = self.max_age is not None and now - self._created_at[id(connection)] > self.max_age
+            stale = (
+                check is not None
+                and self.check_idle is not None
+                and now - released_at > self.check_idle
+                and not check(connection)
+            )
+            if expired or stale:
+                self._discard(connection)
+                continue
+
+            with self._lock:
+                self.reused += 1
+
+            return connection
+
+    def release(self, connection, reusable=True):
+        """Give a connection back to the pool, closing it if it is not reusable"""
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Return the usage counters of the pool"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+                'timeouts': self.timeouts,
+            }
+
+
+def get_pool(alias, settings_dict):
+    """Return the pool of a database alias, created from its POOL settings"""
+    # Django briefly points an alias at another database, e.g. to create the
+    # test database, so pools are per database and not only per alias.
+    key = f"{alias}:{settings_dict['NAME']}@{settings_dict['HOST']}:{settings_dict['PORT']}"
+    with _pools_lock:
+        if key not in _pools:
+            options = settings_dict.get('POOL', {})
+            _pools[key] = ConnectionPool(
+                size=options.get('SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                max_age=options.get('MAX_AGE'),
+                check_idle=options.get('CHECK_IDLE'),
+            )
+
+        return _pools[key]
+
+
+def get_stats():
+    """Return the stats of every pool of this process, by alias and database"""
+    with _pools_lock:
+        pools = dict(_pools)
+
+    return {alias: pool.stats() for alias, pool in pools.items()}
@@ -0,0 +1,38 @@
+"""
+Cache generations
+
+A generation is a counter kept in the cache and made part of the keys of
+a family of entries. Moving it to a new value orphans every entry of the
+family at once; orphans simply expire. Read the generation before the
+data cached under it, so data read from a state changed concurrently is
+stored under an already orphaned key.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get(key):
+    """Return the current value of the generation stored at `key`"""
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock so an evicted generation is never reused.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+
+    return generation
+
+
+def bump(key):
+    """Move the generation stored at `key` to a new value"""
+    def _bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    # Bump now for reads later in this transaction, and again on commit
+    # for entries cached concurrently from the pre-commit state.
+    _bump()
+    transaction.on_commit(_bump)
@@ -0,0 +1,146 @@
+"""
+Django command to audit the query plans of the API endpoints.
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import datasets
+from core.models import Ingredient, Recipe, Tag
+
+FLAGGED_NODES = ('Seq Scan', 'Sort', 'Incremental Sort')
+
+
+def find_flagged_nodes(plan):
+    """Yield the sequential scans and sorts of an EXPLAIN (FORMAT JSON) plan tree"""
+    if plan['Node Type'] in FLAGGED_NODES:
+        yield plan
+    for child in plan.get('Plans', []):
+        yield from find_flagged_nodes(child)
+
+
+def describe_node(node):
+    """Return a one line description of a flagged plan node"""
+    rows = node.get('Actual Rows', node.get('Plan Rows'))
+    if node['Node Type'] == 'Seq Scan':
+        return f"Seq Scan on {node['Relation Name']} ({rows} rows)"
+
+    method = node.get('Sort Method', 'not run')
+    return f"{node['Node Type']} on {', '.join(node['Sort Key'])} ({rows} rows, {method})"
+
+
+class Command(BaseCommand):
+    """Django command to report sequential scans and sorts of the API queries."""
+
+    help = (
+        'Seed a dataset, run every read endpoint of the recipe and user APIs, '
+        'and EXPLAIN (ANALYZE, BUFFERS) each query they issue. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--recipes', type=int, default=2000, help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=200, help='Tags per user.')
+        parser.add_argument('--ingredients', type=int, default=500, help='Ingredients per user.')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if anything is flagged.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The index audit needs PostgreSQL.')
+
+        with transaction.atomic():
+            user = datasets.seed(
+                users=options['users'],
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+            )[0]
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                RESPONSE_CACHE_ENABLED=False,
+            ):
+                flagged = self.audit(user)
+            transaction.set_rollback(True)
+
+        if flagged and options['fail']:
+            raise CommandError(f'{flagged} sequential scans or sorts found.')
+
+    def get_requests(self, user):
+        """Return (name, url, params, index enabled) of every request to audit"""
+        tag_ids = ','.join(str(pk) for pk in Tag.objects.filter(user=user).values_list('pk', flat=True)[:2])
+        ingredient_ids = ','.join(
+            str(pk) for pk in Ingredient.objects.filter(user=user).values_list('pk', flat=True)[:2]
+        )
+        recipe = Recipe.objects.filter(user=user).first()
+        recipes_url = reverse('recipes:recipe-list')
+
+        return [
+            ('user detail', reverse('users:me'), {}, True),
+            ('recipe list', recipes_url, {}, True),
+            ('recipe list by tags', recipes_url, {'tags': tag_ids}, True),
+            ('recipe list by tags (SQL)', recipes_url, {'tags': tag_ids}, False),
+            ('recipe list by all tags (SQL)', recipes_url, {'tags': tag_ids, 'match': 'all'}, False),
+            ('recipe list by ingredients', recipes_url, {'ingredients': ingredient_ids}, True),
+            ('recipe list by ingredients (SQL)', recipes_url, {'ingredients': ingredient_ids}, False),
+            ('recipe search', recipes_url, {'search': 'chicken curry'}, True),
+            ('recipe detail', reverse('recipes:recipe-detail', args=[recipe.pk]), {}, True),
+            ('tag list', reverse('recipes:tag-list'), {}, True),
+            ('tag list assigned only', reverse('recipes:tag-list'), {'assigned_only': 1}, True),
+            ('tag autocomplete', reverse('recipes:tag-autocomplete'), {'q': 'tag 1'}, True),
+            ('ingredient list', reverse('recipes:ingredient-list'), {}, True),
+            ('ingredient list assigned only', reverse('recipes:ingredient-list'), {'assigned_only': 1}, True),
+            ('ingredient autocomplete', reverse('recipes:ingredient-autocomplete'), {'q': 'ingredient 1'}, True),
+        ]
+
+    def audit(self, user):
+        """Run and explain every request, returning the number of flagged nodes"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        seen = set()
+        total = flagged = 0
+        for name, url, params, index_enabled in self.get_requests(user):
+            pages = [(name, url, params)]
+            while pages:
+                name, url, params = pages.pop()
+                with override_settings(RECIPE_INDEX_ENABLED=index_enabled):
+                    with CaptureQueriesContext(connection) as queries:
+                        res = client.get(url, params)
+                if res.status_code != 200:
+                    raise CommandError(f'{name}: GET {url} returned {res.status_code}.')
+                if 'Link' in res and not name.endswith('(next page)'):
+                    next_url = res['Link'].split(';')[0].strip('<>')
+                    pages.append((f'{name} (next page)', next_url, {}))
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: GET {res.request["PATH_INFO"]}'))
+                for query in queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or sql in seen:
+                        continue
+                    seen.add(sql)
+                    total += 1
+                    plan = self.explain(sql)
+                    nodes = list(find_flagged_nodes(plan['Plan']))
+                    flagged += len(nodes)
+                    self.stdout.write(f"  {plan['Execution Time']:8.2f} ms  {sql[:100]}")
+                    for node in nodes:
+                        self.stdout.write(self.style.WARNING(f'                {describe_node(node)}'))
+
+        summary = f'{total} queries audited, {flagged} sequential scans or sorts found.'
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
+
+        return flagged
+
+    def explain(self, sql):
+        """Return the analyzed plan of a query"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+            result = cursor.fetchone()[0]
+
+        return (json.loads(result) if isinstance(result, str) else result)[0]
@@ -0,0 +1,233 @@
+"""
+Django command to benchmark the API endpoints.
+"""
+import io
+import json
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import benchmark, datasets
+from core.models import Ingredient, Recipe, Tag
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def make_image():
+    """Return the bytes of a JPEG photo sized image"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), (200, 120, 40)).save(buffer, format='JPEG')
+
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    """Django command to time the API endpoints and compare them against a baseline."""
+
+    help = (
+        'Seed a dataset, time every endpoint of the recipe and user APIs and record their '
+        'query count, p50/p99 latency and peak memory. Everything runs in a transaction '
+        'that is rolled back, so on-commit work such as image renditions is not measured.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--recipes', type=int, default=2000, help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=200, help='Tags per user.')
+        parser.add_argument('--ingredients', type=int, default=500, help='Ingredients per user.')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per case.')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per case.')
+        parser.add_argument('--case', action='append', help='Only run the cases whose name contains this.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+            help='Baseline JSON file to compare against.',
+        )
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results to the baseline.')
+        parser.add_argument(
+            '--queries-only',
+            action='store_true',
+            help='Only write the query counts to the baseline, so it holds on any database and host.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed relative growth of the p50 latency and memory over the baseline.',
+        )
+        parser.add_argument(
+            '--tail-tolerance',
+            type=float,
+            default=3.0,
+            help='Allowed relative growth of the p99 latency over the baseline.',
+        )
+
+    def handle(self, *args, **options):
+        dataset = {name: options[name] for name in ('users', 'recipes', 'tags', 'ingredients')}
+        results = {
+            'vendor': connection.vendor,
+            'host': benchmark.describe_host(),
+            'dataset': dataset,
+            'iterations': options['iterations'],
+            'cases': {},
+        }
+
+        with tempfile.TemporaryDirectory() as media_root, transaction.atomic():
+            user = datasets.seed(**dataset, password=BENCHMARK_PASSWORD)[0]
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                MEDIA_ROOT=media_root,
+                CHUNKED_UPLOAD_ROOT=os.path.join(media_root, 'chunks'),
+                RESPONSE_CACHE_ENABLED=False,
+            ):
+                for name, request, overrides in self.get_cases(user):
+                    if options['case'] and not any(part in name for part in options['case']):
+                        continue
+                    with override_settings(**overrides):
+                        try:
+                            result = benchmark.measure(name, request, options['iterations'], options['warmup'])
+                        except benchmark.RequestFailed as exc:
+                            raise CommandError(str(exc))
+                    results['cases'][name] = result
+                    self.stdout.write(
+                        f"{name:<36} {result['queries']:3} queries  p50 {result['p50_ms']:8.2f} ms  "
+                        f"p99 {result['p99_ms']:8.2f} ms  peak {result['peak_kib']:8.1f} KiB"
+                    )
+            transaction.set_rollback(True)
+
+        if options['output']:
+            self.write(options['output'], results)
+        if options['update_baseline']:
+            self.write(options['baseline'], benchmark.queries_only(results) if options['queries_only'] else results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        self.compare(options['baseline'], results, options['tolerance'], options['tail_tolerance'])
+
+    def write(self, path, results):
+        with open(path, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+            results_file.write('\n')
+
+    def compare(self, path, results, tolerance, tail_tolerance):
+        """Compare results against the baseline, failing on regressions"""
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f'No baseline at {path}, nothing compared.'))
+            return
+
+        regressions, notes = benchmark.compare(baseline, results, tolerance, tail_tolerance)
+        for note in notes:
+            self.stdout.write(self.style.WARNING(note))
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regressions against {path}.')
+
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def get_cases(self, user):
+        """Return (name, request, settings overrides) of every case to benchmark"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        anonymous = APIClient()
+        prefix = uuid.uuid4().hex[:8]
+        image = make_image()
+
+        # The seeded tags and ingredients are most popular in primary key order.
+        tag_ids = ','.join(
+            str(pk) for pk in Tag.objects.filter(user=user).order_by('pk').values_list('pk', flat=True)[:2]
+        )
+        ingredient_ids = ','.join(
+            str(pk) for pk in Ingredient.objects.filter(user=user).order_by('pk').values_list('pk', flat=True)[:2]
+        )
+        recipe = Recipe.objects.filter(user=user).first()
+        tag = Tag.objects.filter(user=user).first()
+        ingredient = Ingredient.objects.filter(user=user).first()
+        recipes_url = reverse('recipes:recipe-list')
+        recipe_url = reverse('recipes:recipe-detail', args=[recipe.pk])
+        tags_url = reverse('recipes:tag-list')
+        ingredients_url = reverse('recipes:ingredient-list')
+        new_recipe = {
+            'title': 'Benchmark recipe',
+            'time_minutes': 30,
+            'price': '7.50',
+            'tags': [{'name': 'Tag 1'}, {'name': 'Benchmark'}],
+            'ingredients': [{'name': 'Ingredient 1'}, {'name': 'Ingredient 2'}],
+        }
+
+        def upload_image(i):
+            return client.post(
+                reverse('recipes:recipe-upload-image', args=[recipe.pk]),
+                {'image': SimpleUploadedFile('photo.jpg', image)},
+                format='multipart',
+            )
+
+        def upload_image_chunked(i):
+            res = client.post(
+                reverse('recipes:recipe-upload-image-chunked', args=[recipe.pk]),
+                {'filename': 'photo.jpg', 'size': len(image)},
+                format='json',
+            )
+            upload_id = res.data['id']
+            client.put(
+                f"{reverse('recipes:recipe-upload-image-chunk', args=[recipe.pk, upload_id])}?offset=0",
+                image,
+                content_type='application/octet-stream',
+            )
+            return client.post(reverse('recipes:recipe-upload-image-finalize', args=[recipe.pk, upload_id]))
+
+        return [
+            ('user create', lambda i: anonymous.post(
+                reverse('users:create'),
+                {'email': f'bench-{prefix}-{i}@example.com', 'password': BENCHMARK_PASSWORD, 'name': 'Bench'},
+                format='json',
+            ), {}),
+            ('user token', lambda i: anonymous.post(
+                reverse('users:token'), {'email': user.email, 'password': BENCHMARK_PASSWORD}, format='json',
+            ), {}),
+            ('user me', lambda i: client.get(reverse('users:me')), {}),
+            ('user me update', lambda i: client.patch(reverse('users:me'), {'name': f'Bench {i}'}, format='json'), {}),
+            ('recipe list', lambda i: client.get(recipes_url), {}),
+            ('recipe list (response cache)', lambda i: client.get(recipes_url), {'RESPONSE_CACHE_ENABLED': True}),
+            ('recipe list sparse fields', lambda i: client.get(recipes_url, {'fields': 'title,price'}), {}),
+            ('recipe list by tags', lambda i: client.get(recipes_url, {'tags': tag_ids}), {}),
+            ('recipe list by all tags', lambda i: client.get(recipes_url, {'tags': tag_ids, 'match': 'all'}), {}),
+            ('recipe list by ingredients', lambda i: client.get(recipes_url, {'ingredients': ingredient_ids}), {}),
+            ('recipe search', lambda i: client.get(recipes_url, {'search': 'chicken curry'}), {}),
+            ('recipe detail', lambda i: client.get(recipe_url), {}),
+            ('recipe create', lambda i: client.post(recipes_url, new_recipe, format='json'), {}),
+            ('recipe bulk create', lambda i: client.post(
+                reverse('recipes:recipe-bulk'), [new_recipe] * 10, format='json',
+            ), {}),
+            ('recipe update', lambda i: client.patch(recipe_url, {'title': f'Recipe {i}'}, format='json'), {}),
+            ('recipe upload image', upload_image, {}),
+            ('recipe upload image chunked', upload_image_chunked, {}),
+            ('tag list', lambda i: client.get(tags_url), {}),
+            ('tag list assigned only', lambda i: client.get(tags_url, {'assigned_only': 1}), {}),
+            ('tag autocomplete', lambda i: client.get(reverse('recipes:tag-autocomplete'), {'q': 'tag 1'}), {}),
+            ('tag update', lambda i: client.patch(
+                reverse('recipes:tag-detail', args=[tag.pk]), {'name': f'Tag {i}'}, format='json',
+            ), {}),
+            ('ingredient list', lambda i: client.get(ingredients_url), {}),
+            ('ingredient list assigned only', lambda i: client.get(ingredients_url, {'assigned_only': 1}), {}),
+            ('ingredient autocomplete', lambda i: client.get(
+                reverse('recipes:ingredient-autocomplete'), {'q': 'ingredient 1'},
+            ), {}),
+            ('ingredient update', lambda i: client.patch(
+                reverse('recipes:ingredient-detail', args=[ingredient.pk]), {'name': f'Ingredient {i}'}, format='json',
+            ), {}),
+        ]
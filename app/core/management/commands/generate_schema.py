@@ -0,0 +1,17 @@
+"""
+Django command to precompute the OpenAPI schema.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to write the OpenAPI schema served by the API to disk."""
+
+    def handle(self, *args, **options):
+        schema.write(schema.generate())
+        schema.clear()
+
+        self.stdout.write(self.style.SUCCESS(f'Schema written to {settings.SCHEMA_CACHE_DIR}'))
@@ -1,24 +1,60 @@
 """
 Django command to wait for the database to be available.
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from psycopg2 import OperationalError as Psycopg2Error
 from django.db.utils import OperationalError
 
+import random
 import time
 
 
+def wait_for_connection(alias='default', timeout=60, base_delay=0.05, max_delay=2, log=None):
+    """
+    Open a connection, retrying with exponential backoff and full jitter.
+
+    Returns the number of failed attempts, raises CommandError once
+    `timeout` seconds have passed.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            connections[alias].ensure_connection()
+            return attempt
+        except (Psycopg2Error, OperationalError):
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            if time.monotonic() - started + delay > timeout:
+                raise CommandError(f'Database unavailable after {timeout} seconds.')
+            attempt += 1
+            if log:
+                log(f'Database unavailable, retrying in {delay:.2f} seconds...')
+            time.sleep(delay)
+
+
 class Command(BaseCommand):
     """Django command to wait for the database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Probe with a plain connection and exponential backoff instead of system checks.',
+        )
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait with --fast.')
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        while True:
-            try:
-                self.check(databases=['default'])
-                break
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        if options['fast']:
+            wait_for_connection(timeout=options['timeout'], log=self.stdout.write)
+        else:
+            while True:
+                try:
+                    self.check(databases=['default'])
+                    break
+                except (Psycopg2Error, OperationalError):
+                    self.stdout.write('Database unavailable, waiting 1 second...')
+                    time.sleep(1)
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,49 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+import core.operations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}.title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}.description, '')), 'B')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search_idx'),
+        ),
+        core.operations.PostgresRunSQL(
+            sql=f"""
+                CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {SEARCH_VECTOR.format(row='NEW')};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER core_recipe_search_vector_trigger
+                    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+                    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update();
+
+                UPDATE core_recipe SET search_vector = {SEARCH_VECTOR.format(row='core_recipe')};
+            """,
+            reverse_sql="""
+                DROP TRIGGER core_recipe_search_vector_trigger ON core_recipe;
+                DROP FUNCTION core_recipe_search_vector_update();
+            """,
+        ),
+    ]
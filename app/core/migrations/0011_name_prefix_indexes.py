@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:09
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+import core.operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        core.operations.PostgresAddIndex(
+            model_name='ingredient',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='core_ingredient_prefix_idx'),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='tag',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='core_tag_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_api_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'base_manager_name': 'objects'},
+        ),
+    ]
@@ -1,24 +1,48 @@
 """
 Database models.
 """
+import hashlib
 import uuid
 import os
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+
+from core.storage import recipe_image_storage
+
+
+def _file_digest(file):
+    """Return the SHA-256 hex digest of a file content"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+
+    return digest.hexdigest()
 
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image"""
+    """Generate file path for new recipe image
+
+    Images are named after the SHA-256 of their bytes, in two levels of
+    shard directories, so identical uploads share one immutable file.
+    """
     ext = os.path.splitext(filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
+    image = getattr(instance, "image", None)
+    if not image:
+        return os.path.join("uploads", "recipe", f"{uuid.uuid4()}{ext}")
 
-    return os.path.join("uploads", "recipe", filename)
+    digest = _file_digest(image.file)
+
+    return os.path.join("uploads", "recipe", digest[:2], digest[2:4], f"{digest}{ext.lower()}")
 
 
 class UserManager(BaseUserManager):
@@ -57,6 +81,18 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Case-insensitive prefix search, maintained on PostgreSQL only.
+            models.Index(
+                "user",
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="core_tag_prefix_idx",
+            ),
+            models.Index(fields=["user", "-name", "-id"], name="core_tag_user_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -68,11 +104,29 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Case-insensitive prefix search, maintained on PostgreSQL only.
+            models.Index(
+                "user",
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="core_ingredient_prefix_idx",
+            ),
+            models.Index(fields=["user", "-name", "-id"], name="core_ingredient_user_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    def get_queryset(self):
+        """Leave out the search vector, it is only read by the database"""
+        return super().get_queryset().defer("search_vector")
+
+
 class Recipe(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -85,7 +139,56 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField(Tag)
     ingredients = models.ManyToManyField(Ingredient)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        db_index=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage,
+    )
+    image_renditions = models.JSONField(default=dict, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL, see migration 0010.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
+
+    class Meta:
+        # Related object access also leaves out the search vector.
+        base_manager_name = "objects"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="core_recipe_search_idx"),
+            models.Index(fields=["user", "-id"], name="core_recipe_user_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImageUpload(models.Model):
+    """Chunked upload of a recipe image in progress"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="image_uploads",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def path(self):
+        """Path of the part file holding the bytes received so far"""
+        return os.path.join(settings.CHUNKED_UPLOAD_ROOT, f"{self.id}.part")
+
+    @property
+    def offset(self):
+        """Number of bytes received so far"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def __str__(self):
+        return self.filename
+
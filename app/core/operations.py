@@ -0,0 +1,27 @@
+"""
+Migration operations applied on PostgreSQL only
+
+The model state changes on every database, so later migrations stay
+consistent, but the schema is only altered where the feature exists.
+"""
+from django.db import migrations
+
+
+class PostgresOnlyMixin:
+    """Skip the database side of an operation on other databases"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class PostgresAddIndex(PostgresOnlyMixin, migrations.AddIndex):
+    """Add an index on PostgreSQL only"""
+
+
+class PostgresRunSQL(PostgresOnlyMixin, migrations.RunSQL):
+    """Run SQL on PostgreSQL only"""
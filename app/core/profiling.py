@@ -0,0 +1,121 @@
+"""
+Per-request profiling
+
+When PROFILING_ENABLED is set, every response carries a Server-Timing
+header with the SQL query count and time, the serializer time and the
+total time spent in the middleware stack and view. A sampled fraction of
+requests, and requests sending the PROFILING_SECRET in an X-Profile
+header, are also run under cProfile and dumped to PROFILING_DIR.
+"""
+import contextlib
+import contextvars
+import cProfile
+import hmac
+import os
+import random
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings of one request, also used as a database execute wrapper"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serialize_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+
+class ProfiledSerializerMixin:
+    """Add the time spent representing instances to the request profile"""
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        # Nested serializers are part of the outermost one's time.
+        if profile is None or profile.serialize_depth:
+            return super().to_representation(instance)
+
+        profile.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serialize += time.perf_counter() - started
+            profile.serialize_depth -= 1
+
+
+class ProfilingMiddleware:
+    """Report where the time of each request goes and profile some of them"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        profiler = cProfile.Profile() if self.should_profile(request) else None
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                if profiler:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        metrics = [
+            f'db;dur={profile.db * 1000:.3f};desc="{profile.queries} queries"',
+            f'serialize;dur={profile.serialize * 1000:.3f}',
+            f'total;dur={total * 1000:.3f}',
+        ]
+        if profiler:
+            metrics.append(f'profile;desc="{self.dump(request, profiler)}"')
+        if 'Server-Timing' in response:
+            metrics.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(metrics)
+
+        return response
+
+    def should_profile(self, request):
+        """Return whether to run a request under cProfile"""
+        secret = settings.PROFILING_SECRET
+        if secret and hmac.compare_digest(request.META.get(PROFILE_HEADER, '').encode(), secret.encode()):
+            return True
+
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def dump(self, request, profiler):
+        """Write the stats of a profiled request to PROFILING_DIR and return the file name"""
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80]
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}.prof'
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+
+        return name
@@ -0,0 +1,86 @@
+"""
+Precomputed OpenAPI schema
+
+The schema is generated once per format, by the `generate_schema` command
+at build time or by the first request, and written to SCHEMA_CACHE_DIR.
+Each process then keeps the rendered bytes and their ETag in memory.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_path(fmt):
+    """Return the file the schema is stored in for a format"""
+    return os.path.join(settings.SCHEMA_CACHE_DIR, f'schema.{fmt}')
+
+
+def generate():
+    """Generate the schema and return it rendered in every format"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+    return {fmt: renderer().render(schema, renderer_context={}) for fmt, renderer in RENDERERS.items()}
+
+
+def write(contents):
+    """Atomically write rendered schemas to SCHEMA_CACHE_DIR"""
+    os.makedirs(settings.SCHEMA_CACHE_DIR, exist_ok=True)
+    for fmt, content in contents.items():
+        fd, tmp_path = tempfile.mkstemp(dir=settings.SCHEMA_CACHE_DIR)
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, get_path(fmt))
+
+
+def _read(fmt):
+    try:
+        with open(get_path(fmt), 'rb') as schema_file:
+            return schema_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def get(fmt):
+    """Return the rendered schema and its ETag, generating them if missing"""
+    entry = _cache.get(fmt)
+    if entry is not None:
+        return entry
+
+    with _lock:
+        if fmt not in _cache:
+            content = _read(fmt)
+            if content is None:
+                contents = generate()
+                try:
+                    write(contents)
+                except OSError:
+                    logger.warning('Could not write the schema to %s', settings.SCHEMA_CACHE_DIR, exc_info=True)
+                content = contents[fmt]
+            etag = quote_etag(hashlib.blake2b(content, digest_size=16).hexdigest())
+            _cache[fmt] = (content, etag)
+
+    return _cache[fmt]
+
+
+def clear():
+    """Forget the schemas held in memory"""
+    _cache.clear()
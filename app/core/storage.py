@@ -0,0 +1,66 @@
+"""
+File storages.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+
+def lock(name):
+    """
+    Lock a stored name until the end of the current transaction.
+
+    Writing a name and deleting it once unreferenced both take the lock,
+    so a file is never deleted between being found in place and being
+    referenced. Only PostgreSQL has the advisory locks this relies on.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    key = int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage for files named after a hash of their content.
+
+    A name always holds the same bytes, so saving a name that exists is a
+    no-op and the stored files never change once written. Files are
+    written to a temporary file first and moved in place atomically.
+    Saving locks the name, save in the transaction that references it.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        lock(name)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name
+
+
+recipe_image_storage = ContentAddressedStorage()
@@ -0,0 +1,137 @@
+"""
+Tests for the API benchmarks.
+"""
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from core import benchmark
+
+
+def make_results(vendor='postgresql', **case):
+    result = {'queries': 3, 'mean_ms': 10, 'p50_ms': 10, 'p99_ms': 20, 'wall_s': 1, 'peak_kib': 100}
+    result.update(case)
+
+    return {
+        'vendor': vendor,
+        'host': 'x86_64, 4 CPUs, Python 3.11.7',
+        'dataset': {'users': 1},
+        'iterations': 10,
+        'cases': {'recipe list': result},
+    }
+
+
+class CompareTests(SimpleTestCase):
+    """Test comparing benchmark results against a baseline."""
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+    def test_no_regression(self):
+        """Test results within the tolerance pass."""
+        regressions, notes = benchmark.compare(make_results(), make_results(p50_ms=14, p99_ms=60), 0.5, 3)
+
+        self.assertEqual(regressions, [])
+        self.assertEqual(notes, [])
+
+    def test_more_queries(self):
+        """Test any extra query is a regression."""
+        regressions, _ = benchmark.compare(make_results(), make_results(queries=4), 0.5, 3)
+
+        self.assertEqual(regressions, ['recipe list: 4 queries, baseline 3'])
+
+    def test_slower_and_bigger(self):
+        """Test timings and memory past the tolerance are regressions."""
+        regressions, _ = benchmark.compare(make_results(), make_results(p50_ms=16, peak_kib=200), 0.5, 3)
+
+        self.assertEqual(len(regressions), 2)
+
+    def test_noise_floor(self):
+        """Test differences below the noise floor are ignored."""
+        baseline = make_results(p50_ms=0.5, p99_ms=0.5)
+
+        regressions, _ = benchmark.compare(baseline, make_results(p50_ms=1.2, p99_ms=1.2), 0.5, 0.5)
+
+        self.assertEqual(regressions, [])
+
+    def test_other_database(self):
+        """Test only query counts are compared against a baseline from another database."""
+        results = make_results(vendor='sqlite', queries=4, p50_ms=100)
+
+        regressions, notes = benchmark.compare(make_results(), results, 0.5, 3)
+
+        self.assertEqual(regressions, ['recipe list: 4 queries, baseline 3'])
+        self.assertEqual(len(notes), 1)
+
+
+    def test_queries_only_baseline(self):
+        """Test only query counts are compared against a baseline without timings."""
+        baseline = benchmark.queries_only(make_results())
+        results = make_results(queries=4, p50_ms=100)
+
+        regressions, notes = benchmark.compare(baseline, results, 0.5, 3)
+
+        self.assertEqual(baseline['cases'], {'recipe list': {'queries': 3}})
+        self.assertEqual(regressions, ['recipe list: 4 queries, baseline 3'])
+        self.assertEqual(len(notes), 1)
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test the benchmark command."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp_dir.name, 'results.json')
+        self.baseline = os.path.join(self.tmp_dir.name, 'baseline.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def benchmark(self, **options):
+        call_command(
+            'benchmark',
+            users=1,
+            recipes=3,
+            tags=3,
+            ingredients=3,
+            iterations=2,
+            warmup=1,
+            case=['recipe list', 'recipe upload image'],
+            baseline=self.baseline,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_write_results(self):
+        """Test results are written for the selected cases."""
+        self.benchmark(output=self.output)
+
+        with open(self.output) as results_file:
+            results = json.load(results_file)
+        self.assertEqual(results['dataset'], {'users': 1, 'recipes': 3, 'tags': 3, 'ingredients': 3})
+        self.assertIn('recipe list by tags', results['cases'])
+        self.assertIn('recipe upload image', results['cases'])
+        self.assertNotIn('tag list', results['cases'])
+        self.assertEqual(results['cases']['recipe list (response cache)']['queries'], 0)
+
+    def test_fails_on_regression(self):
+        """Test the command fails when a case issues more queries than its baseline."""
+        self.benchmark(update_baseline=True)
+        with open(self.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        baseline['cases']['recipe list']['queries'] -= 1
+        with open(self.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+
+        with self.assertRaises(CommandError):
+            self.benchmark()
@@ -1,12 +1,21 @@
 """
 Test custom Django management commands.
 """
+import io
+import os
+import tempfile
+from unittest import skipUnless
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.management.commands.audit_indexes import find_flagged_nodes
+from core.models import Recipe
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -30,3 +39,82 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+@patch('core.management.commands.wait_for_db.time.sleep')
+@patch('core.management.commands.wait_for_db.connections')
+class FastWaitForDbTests(SimpleTestCase):
+    """Test waiting for the database with a connection probe."""
+
+    def test_wait_for_db_fast_backoff(self, patched_connections, patched_sleep):
+        """Test the probe is retried with growing, jittered delays."""
+        ensure_connection = patched_connections.__getitem__.return_value.ensure_connection
+        ensure_connection.side_effect = [OperationalError] * 4 + [None]
+
+        with patch('core.management.commands.wait_for_db.random.uniform', side_effect=lambda a, b: b):
+            call_command('wait_for_db', fast=True, stdout=io.StringIO())
+
+        self.assertEqual(ensure_connection.call_count, 5)
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.05, 0.1, 0.2, 0.4])
+
+    def test_wait_for_db_fast_timeout(self, patched_connections, patched_sleep):
+        """Test waiting gives up after the timeout."""
+        patched_connections.__getitem__.return_value.ensure_connection.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', fast=True, timeout=0, stdout=io.StringIO())
+
+
+@patch('core.management.commands.boot.call_command')
+class BootTests(TestCase):
+    """Test the fast boot command."""
+
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        self.state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.state_dir.cleanup)
+
+    def test_boot_skips_unchanged_steps(self, patched_call_command):
+        """Test static files are only collected when their sources change."""
+        with override_settings(STATIC_ROOT=self.static_root.name, BOOT_STATE_DIR=self.state_dir.name):
+            call_command('boot', stdout=io.StringIO())
+            out = io.StringIO()
+            call_command('boot', stdout=out)
+
+        patched_call_command.assert_called_once_with('collectstatic', interactive=False, verbosity=0)
+        self.assertIn('skipped, sources unchanged', out.getvalue())
+        self.assertIn('skipped, no unapplied migrations', out.getvalue())
+        self.assertEqual(os.listdir(self.static_root.name), [])
+
+
+class AuditIndexesTests(TestCase):
+    """Test the index audit command."""
+
+    def test_find_flagged_nodes(self):
+        """Test sequential scans and sorts are found anywhere in a plan."""
+        plan = {
+            'Node Type': 'Limit',
+            'Plans': [{
+                'Node Type': 'Sort',
+                'Plans': [
+                    {'Node Type': 'Index Scan', 'Relation Name': 'core_recipe'},
+                    {'Node Type': 'Seq Scan', 'Relation Name': 'core_tag'},
+                ],
+            }],
+        }
+
+        nodes = [node['Node Type'] for node in find_flagged_nodes(plan)]
+
+        self.assertEqual(nodes, ['Sort', 'Seq Scan'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN ANALYZE needs PostgreSQL')
+    def test_audit_indexes(self):
+        """Test the audit explains the API queries and leaves no data behind."""
+        out = io.StringIO()
+
+        call_command('audit_indexes', users=2, recipes=50, tags=10, ingredients=20, stdout=out)
+
+        self.assertIn('queries audited', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,93 @@
+"""
+Tests for the synthetic datasets.
+"""
+import io
+import random
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core import datasets
+from core.models import Ingredient, Recipe, Tag, User
+
+
+class SamplingTests(SimpleTestCase):
+    """Test the sampling helpers."""
+
+    def test_zipf_table(self):
+        """Test items appear in the table in proportion to 1 / rank."""
+        table = datasets.zipf_table(3, 1)
+
+        self.assertEqual(len(table), datasets.LOOKUP_TABLE_SIZE)
+        counts = [table.count(i) for i in range(3)]
+        self.assertAlmostEqual(counts[0] / counts[1], 2, places=2)
+        self.assertAlmostEqual(counts[0] / counts[2], 3, places=2)
+
+    def test_sample(self):
+        """Test sampling picks k items of the table, reproducibly."""
+        table = datasets.lookup_table(['a', 'b'], [3, 1])
+
+        picks = datasets.sample(random.Random(1), table, 1000)
+
+        self.assertEqual(len(picks), 1000)
+        self.assertEqual(set(picks), {'a', 'b'})
+        self.assertGreater(picks.count('a'), 2 * picks.count('b'))
+        self.assertEqual(picks, datasets.sample(random.Random(1), table, 1000))
+
+    def test_copy_value(self):
+        """Test values are escaped for the COPY text format."""
+        self.assertEqual(datasets._copy_value('tab\there\\'), 'tab\\there\\\\')
+        self.assertEqual(datasets._copy_value(None), '\\N')
+        self.assertEqual(datasets._copy_value(True), 't')
+        self.assertEqual(datasets._copy_value(12), '12')
+
+
+class SeedTests(TestCase):
+    """Test seeding a dataset."""
+
+    def test_seed_command(self):
+        """Test the command loads every user's rows, linked within the user."""
+        out = io.StringIO()
+
+        call_command('seed', users=2, recipes=30, tags=5, ingredients=8, password='secret123', stdout=out)
+
+        self.assertIn('60 recipes', out.getvalue())
+        users = User.objects.filter(email__startswith='seed-')
+        self.assertEqual(users.count(), 2)
+        for user in users:
+            self.assertTrue(user.check_password('secret123'))
+            self.assertEqual(Recipe.objects.filter(user=user).count(), 30)
+            self.assertEqual(Tag.objects.filter(user=user).count(), 5)
+            self.assertEqual(Ingredient.objects.filter(user=user).count(), 8)
+            self.assertFalse(Recipe.tags.through.objects.filter(recipe__user=user).exclude(tag__user=user).exists())
+            self.assertFalse(
+                Recipe.ingredients.through.objects.filter(recipe__user=user).exclude(ingredient__user=user).exists()
+            )
+        self.assertTrue(all(1 <= recipe.ingredients.count() <= 8 for recipe in Recipe.objects.all()))
+
+    def test_seed_after_existing_rows(self):
+        """Test seeded primary keys follow the existing rows."""
+        existing = User.objects.create_user(email='existing@example.com', password='password')
+
+        users = datasets.seed(users=1, recipes=2, tags=1, ingredients=1)
+
+        self.assertEqual(users[0].pk, existing.pk + 1)
+        self.assertFalse(users[0].has_usable_password())
+        self.assertEqual(Recipe.objects.filter(user=users[0]).count(), 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'The search vector trigger needs PostgreSQL')
+    def test_seed_search_vectors(self):
+        """Test seeded recipes get search vectors and later saves still update them."""
+        users = datasets.seed(users=1, recipes=3, tags=1, ingredients=1)
+        recipes = Recipe.objects.filter(user=users[0])
+
+        self.assertFalse(recipes.filter(search_vector=None).exists())
+        recipe = recipes.first()
+        recipe.title = 'Lentil stew'
+        recipe.save()
+        self.assertIn('stew', str(recipes.values_list('search_vector', flat=True).get(pk=recipe.pk)))
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Recipe._meta.db_table)
+        self.assertIn(datasets.SEARCH_INDEX, constraints)
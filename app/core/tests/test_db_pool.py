@@ -0,0 +1,114 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+DB_STATUS_URL = reverse('db-status')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool."""
+
+    def test_reuse_released_connection(self):
+        """Test a released connection is handed out again."""
+        pool = ConnectionPool(size=2)
+        connect = MagicMock(side_effect=lambda: MagicMock())
+
+        first = pool.acquire(connect)
+        pool.release(first)
+        second = pool.acquire(connect)
+
+        self.assertIs(first, second)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+
+    def test_pool_bounded(self):
+        """Test no more than `size` connections are handed out at once."""
+        pool = ConnectionPool(size=1, timeout=0.01)
+        connection = pool.acquire(MagicMock)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(MagicMock)
+
+        pool.release(connection)
+        self.assertIs(pool.acquire(MagicMock), connection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiting_thread_gets_released_connection(self):
+        """Test a thread waiting for a slot gets the connection freed up."""
+        pool = ConnectionPool(size=1, timeout=5)
+        connection = pool.acquire(MagicMock)
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(MagicMock)))
+
+        waiter.start()
+        pool.release(connection)
+        waiter.join()
+
+        self.assertEqual(acquired, [connection])
+
+    def test_unusable_connections_discarded(self):
+        """Test broken, stale and expired connections are closed, not reused."""
+        pool = ConnectionPool(size=1, check_idle=30)
+        broken = pool.acquire(MagicMock)
+        pool.release(broken, reusable=False)
+        with patch('core.db.pool.time.monotonic', return_value=0):
+            stale = pool.acquire(MagicMock)
+            pool.release(stale)
+
+        with patch('core.db.pool.time.monotonic', return_value=31):
+            fresh = pool.acquire(MagicMock, check=lambda connection: False)
+
+        self.assertIsNot(fresh, stale)
+        broken.close.assert_called_once()
+        stale.close.assert_called_once()
+        self.assertEqual(pool.stats()['discarded'], 2)
+
+    def test_expired_connection_discarded(self):
+        """Test connections older than max age are replaced."""
+        pool = ConnectionPool(size=1, max_age=60)
+        with patch('core.db.pool.time.monotonic', return_value=0):
+            old = pool.acquire(MagicMock)
+            pool.release(old)
+
+        with patch('core.db.pool.time.monotonic', return_value=61):
+            new = pool.acquire(MagicMock)
+
+        self.assertIsNot(new, old)
+        old.close.assert_called_once()
+
+
+class DatabaseStatusTests(TestCase):
+    """Test the database status endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_status_requires_admin(self):
+        """Test only admins see the database status."""
+        user = get_user_model().objects.create_user('user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_STATUS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_status(self):
+        """Test the database status lists every database and pool."""
+        admin = get_user_model().objects.create_superuser('admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_STATUS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('default', res.data['databases'])
+        self.assertIn('pools', res.data)
@@ -1,13 +1,18 @@
 """
 Tests for models.
 """
+from unittest import skipUnless
 from unittest.mock import patch
 from decimal import Decimal
+import hashlib
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
-from core import models
+from core import models, storage
 
 
 def create_user(email="test@email.com", password="password"):
@@ -93,3 +98,71 @@ class ModelTests(TestCase):
         file_path = models.recipe_image_file_path(None, "example.jpg")
 
         self.assertEqual(file_path, f"uploads/recipe/{uuid}.jpg")
+
+    def test_recipe_file_name_content_hash(self):
+        """Test image path is derived from the image content"""
+        content = b"image content"
+        recipe = models.Recipe(image=SimpleUploadedFile("example.JPG", content))
+        digest = hashlib.sha256(content).hexdigest()
+
+        file_path = models.recipe_image_file_path(recipe, "example.JPG")
+
+        self.assertEqual(file_path, f"uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+
+    def test_recipe_search_vector_deferred(self):
+        """Test recipes are loaded without their search vector"""
+        recipe = models.Recipe.objects.create(
+            user=create_user(),
+            title="Lentil soup",
+            time_minutes=5,
+            price=Decimal("5.50"),
+        )
+
+        self.assertEqual(models.Recipe.objects.get(pk=recipe.pk).get_deferred_fields(), {"search_vector"})
+
+    def test_related_recipe_search_vector_deferred(self):
+        """Test recipes reached through relations are loaded without their search vector"""
+        recipe = models.Recipe.objects.create(
+            user=create_user(),
+            title="Lentil soup",
+            time_minutes=5,
+            price=Decimal("5.50"),
+        )
+        tag = models.Tag.objects.create(user=recipe.user, name="Soup")
+        recipe.tags.add(tag)
+        upload = models.RecipeImageUpload.objects.create(recipe=recipe, filename="a.jpg", size=1)
+        upload = models.RecipeImageUpload.objects.get(pk=upload.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            upload.recipe
+            list(models.Tag.objects.prefetch_related("recipe_set").get(pk=tag.pk).recipe_set.all())
+
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertNotIn("search_vector", query["sql"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL")
+    def test_recipe_search_vector_trigger(self):
+        """Test the recipe search vector follows title and description"""
+        recipe = models.Recipe.objects.create(
+            user=create_user(),
+            title="Lentil soup",
+            time_minutes=5,
+            price=Decimal("5.50"),
+            description="Warming",
+        )
+        recipe.title = "Lentil stew"
+        recipe.save()
+
+        search_vector = str(models.Recipe.objects.values_list("search_vector", flat=True).get(pk=recipe.pk))
+        self.assertIn("stew", search_vector)
+        self.assertIn("warm", search_vector)
+
+    @skipUnless(connection.vendor == "postgresql", "Advisory locks need PostgreSQL")
+    def test_storage_lock_held_in_transaction(self):
+        """Test locking a stored name holds an advisory lock until the transaction ends"""
+        query = "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+        with transaction.atomic(), connection.cursor() as cursor:
+            storage.lock("uploads/recipe/ab/cd/abcd.jpg")
+            cursor.execute(query)
+            self.assertEqual(cursor.fetchone()[0], 1)
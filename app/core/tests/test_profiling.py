@@ -0,0 +1,86 @@
+"""
+Tests for the profiling middleware.
+"""
+import os
+import pstats
+import re
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from recipe.tests.utils import create_recipe, create_tag, create_user
+
+RECIPES_URL = reverse('recipes:recipe-list')
+
+
+def get_metrics(response):
+    """Return the Server-Timing metrics of a response by name"""
+    return {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_SECRET='s3cret')
+class ProfilingMiddlewareTests(TestCase):
+    """Test the Server-Timing headers and profile dumps."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(PROFILING_DIR=self.tmp_dir.name, RESPONSE_CACHE_ENABLED=False)
+        self.settings.enable()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(create_tag(user=self.user))
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tmp_dir.cleanup()
+
+    def test_server_timing(self):
+        """Test the query count and the db, serialize and total times are reported."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+
+        metrics = get_metrics(res)
+        self.assertIn(f'desc="{len(queries)} queries"', metrics['db'])
+        durations = {name: float(re.search(r'dur=([\d.]+)', metrics[name]).group(1)) for name in metrics}
+        self.assertGreater(durations['serialize'], 0)
+        self.assertLess(durations['db'] + durations['serialize'], durations['total'])
+        self.assertNotIn('profile', metrics)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_profile_with_secret(self):
+        """Test a request sending the secret is profiled and dumped."""
+        res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='s3cret')
+
+        name = re.search(r'desc="(.+)"', get_metrics(res)['profile']).group(1)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [name])
+        stats = pstats.Stats(os.path.join(self.tmp_dir.name, name))
+        self.assertTrue(any(func[2] == 'list' for func in stats.stats))
+
+    def test_wrong_secret(self):
+        """Test a request sending another secret is not profiled."""
+        res = self.client.get(RECIPES_URL, HTTP_X_PROFILE='guess')
+
+        self.assertNotIn('profile', get_metrics(res))
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled(self):
+        """Test sampled requests are profiled."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIn('profile', get_metrics(res))
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 1)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        """Test nothing is reported unless profiling is enabled."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('Server-Timing', res)
@@ -0,0 +1,70 @@
+"""
+Tests for the API renderers and parsers.
+"""
+import io
+import json
+from decimal import Decimal
+
+import msgpack
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from recipe.serializers import RecipeDetailSerializer
+from recipe.tests import utils
+
+
+class RendererTests(TestCase):
+    """Test rendering and parsing API data."""
+
+    def setUp(self):
+        self.user = utils.create_user()
+        self.recipe = utils.create_recipe(user=self.user, price=Decimal('12.30'))
+        self.recipe.tags.add(utils.create_tag(user=self.user, name='Vegan'))
+        self.data = RecipeDetailSerializer(self.recipe).data
+
+    def test_json_round_trip(self):
+        """Test recipes render to the same JSON as the DRF renderer."""
+        content = ORJSONRenderer().render(self.data)
+
+        self.assertEqual(json.loads(content), json.loads(JSONRenderer().render(self.data)))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(content)), json.loads(content))
+
+    def test_msgpack_round_trip(self):
+        """Test recipes survive rendering and parsing MessagePack."""
+        content = MessagePackRenderer().render(self.data)
+
+        parsed = MessagePackParser().parse(io.BytesIO(content))
+
+        self.assertEqual(parsed, json.loads(JSONRenderer().render(self.data)))
+        self.assertEqual(parsed['price'], '12.30')
+
+    def test_render_decimal_and_lazy_strings(self):
+        """Test raw decimals stay exact and lazy strings are rendered."""
+        data = {'price': Decimal('0.10'), 'detail': gettext_lazy('Not found.')}
+
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), {'price': '0.10', 'detail': 'Not found.'})
+        self.assertEqual(msgpack.unpackb(MessagePackRenderer().render(data)), {'price': '0.10', 'detail': 'Not found.'})
+
+    def test_api_msgpack(self):
+        """Test the API speaks MessagePack when asked to."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('recipes:recipe-list')
+
+        res = client.get(url, HTTP_ACCEPT='application/msgpack')
+        res_create = client.post(
+            url,
+            msgpack.packb({'title': 'Soup', 'time_minutes': 10, 'price': '2.50'}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content)[0]['id'], self.recipe.id)
+        self.assertEqual(res_create.status_code, 201)
+        self.assertEqual(msgpack.unpackb(res_create.content)['title'], 'Soup')
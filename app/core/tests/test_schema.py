@@ -0,0 +1,84 @@
+"""
+Tests for the precomputed OpenAPI schema.
+"""
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class CachedSchemaTests(TestCase):
+    """Test serving the schema from the cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(SCHEMA_CACHE_ENABLED=True, SCHEMA_CACHE_DIR=self.tmp_dir.name)
+        self.settings.enable()
+        schema.clear()
+
+    def tearDown(self):
+        schema.clear()
+        self.settings.disable()
+        self.tmp_dir.cleanup()
+
+    def test_generate_schema_command(self):
+        """Test the command writes the schema in every format."""
+        call_command('generate_schema', stdout=io.StringIO())
+
+        with open(os.path.join(self.tmp_dir.name, 'schema.json'), 'rb') as schema_file:
+            self.assertIn('/api/recipes/recipes/', json.loads(schema_file.read())['paths'])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'schema.yaml')))
+
+    def test_first_request_generates_once(self):
+        """Test the schema is generated and stored on the first request only."""
+        with patch('core.schema.generate', wraps=schema.generate) as generate:
+            res1 = self.client.get(SCHEMA_URL)
+            res2 = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res1.status_code, status.HTTP_200_OK)
+        self.assertEqual(res1.content, res2.content)
+        self.assertEqual(res1['ETag'], res2['ETag'])
+        self.assertEqual(generate.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'schema.yaml')))
+
+    def test_serves_precomputed_file(self):
+        """Test a schema written beforehand is served as is."""
+        schema.write({'yaml': b'openapi: 3.0.3\n', 'json': b'{"openapi": "3.0.3"}'})
+
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b'{"openapi": "3.0.3"}')
+        self.assertEqual(res['Content-Type'], 'application/vnd.oai.openapi+json')
+
+    def test_matches_generated_schema(self):
+        """Test the cached schema is the one the schema view would generate."""
+        res = self.client.get(SCHEMA_URL)
+
+        with override_settings(SCHEMA_CACHE_ENABLED=False):
+            expected = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.content, expected.content)
+        self.assertEqual(res['Content-Type'], expected['Content-Type'])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match is answered with 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
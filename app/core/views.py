@@ -0,0 +1,61 @@
+"""
+Views for the service status.
+"""
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.utils import OpenApiTypes, extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import schema
+from core.db.pool import get_stats
+from user.authentication import CachedTokenAuthentication
+
+
+class DatabaseStatusView(APIView):
+    """Show the database connection settings and pool usage of this worker."""
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        databases = {
+            alias: {
+                'vendor': connections[alias].vendor,
+                'conn_max_age': connections[alias].settings_dict['CONN_MAX_AGE'],
+                'conn_health_checks': connections[alias].settings_dict['CONN_HEALTH_CHECKS'],
+            }
+            for alias in connections
+        }
+
+        return Response({'pid': os.getpid(), 'databases': databases, 'pools': get_stats()})
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the precomputed OpenAPI schema from memory."""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if not settings.SCHEMA_CACHE_ENABLED or request.GET.get('lang') or request.GET.get('version'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        content, etag = schema.get(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+
+        return response
@@ -0,0 +1,45 @@
+"""
+Conditional GET support for the recipe APIs
+
+Details are validated with their `updated_at` column. Lists carry an
+ETag derived from the user's data generation, which every write to their
+recipes, tags, ingredients or the links between them moves, so an
+unchanged list is answered with 304 without querying the database.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, *state):
+    """Return an ETag for the requested representation of some resource state"""
+    parts = (request.user.pk, request.get_full_path(), request.accepted_media_type, *state)
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16)
+
+    return quote_etag(digest.hexdigest())
+
+
+def collection_etag(request, generation):
+    """Return the ETag of a list at a data generation of its user"""
+    return make_etag(request, "generation", generation)
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response if the client copy is still fresh, else None"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Add the validators to a response and make clients revalidate it"""
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
@@ -0,0 +1,83 @@
+"""
+Filters for the recipe APIs
+
+Related items are matched with EXISTS / IN semi-join subqueries against the
+M2M through tables, so no join fan-out happens and no DISTINCT is needed.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, Count, Exists, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from core.models import Recipe
+
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+MATCH_CHOICES = [MATCH_ANY, MATCH_ALL]
+
+# Text search configuration the `search_vector` trigger is built with.
+SEARCH_CONFIG = "english"
+
+
+def get_through(field):
+    """Return the through model of `Recipe.<field>` and its two FK names"""
+    m2m = Recipe._meta.get_field(field)
+
+    return m2m.remote_field.through, m2m.m2m_field_name(), m2m.m2m_reverse_field_name()
+
+
+def filter_by_related(queryset, field, ids, match=MATCH_ANY):
+    """Filter recipes linked to any or all of the `field` items in `ids`"""
+    through, recipe_name, item_name = get_through(field)
+    links = through.objects.filter(**{f"{item_name}__in": ids})
+    if match == MATCH_ALL:
+        matching = (
+            links.values(recipe_name)
+            .annotate(matched=Count(item_name))
+            .filter(matched=len(set(ids)))
+            .values(recipe_name)
+        )
+        return queryset.filter(pk__in=matching)
+
+    return queryset.filter(Exists(links.filter(**{recipe_name: OuterRef("pk")})))
+
+
+def filter_assigned(queryset, field):
+    """Filter tags/ingredients assigned to at least one recipe through `field`"""
+    through, recipe_name, item_name = get_through(field)
+
+    return queryset.filter(Exists(through.objects.filter(**{item_name: OuterRef("pk")})))
+
+
+def annotate_usage(queryset, field):
+    """Annotate tags/ingredients with the number of recipes using them as `usage`"""
+    through, recipe_name, item_name = get_through(field)
+    usage = (
+        through.objects.filter(**{item_name: OuterRef("pk")})
+        .order_by()
+        .values(item_name)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+    return queryset.annotate(usage=Coalesce(Subquery(usage), 0))
+
+
+def search(queryset, text):
+    """Filter recipes matching a web search style `text`, annotated with a `rank`"""
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(rank=rank)
+
+    # Without full-text search every word must appear in the title or the
+    # description, and recipes with the whole text in their title rank first.
+    for word in text.split():
+        queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    rank = Case(
+        When(title__icontains=text, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    return queryset.annotate(rank=rank)
@@ -0,0 +1,73 @@
+"""
+Per-user inverted index from tags and ingredients to recipe IDs
+
+Each cache entry maps one tag or ingredient to the sorted array of the IDs
+of the user's recipes linked to it. Entries are built lazily from the M2M
+through tables and keyed on the user's index generation of their field,
+which any change to the links moves. The generation is read before the
+links are, so an entry built from a state changed concurrently is stored
+under an already orphaned key; orphans simply expire.
+"""
+from array import array
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import generations
+from recipe.filters import MATCH_ALL, get_through
+
+
+def _generation_key(user_id, field):
+    return f"recipe-index-generation:{user_id}:{field}"
+
+
+def _key(user_id, field, generation, item_id):
+    return f"recipe-index:{user_id}:{field}:{generation}:{item_id}"
+
+
+def get_generation(user_id, field):
+    """Return the current index generation of the `field` items of a user"""
+    return generations.get(_generation_key(user_id, field))
+
+
+def get_postings(user, field, ids):
+    """Return a mapping of each `field` item ID to its sorted recipe IDs"""
+    generation = get_generation(user.id, field)
+    keys = {_key(user.id, field, generation, item_id): item_id for item_id in set(ids)}
+    postings = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = [item_id for item_id in keys.values() if item_id not in postings]
+    if not missing:
+        return postings
+
+    built = {item_id: array("q") for item_id in missing}
+    through, recipe_name, item_name = get_through(field)
+    links = (
+        through.objects.filter(**{f"{item_name}__in": missing, f"{recipe_name}__user": user})
+        .order_by(f"{recipe_name}_id")
+        .values_list(f"{item_name}_id", f"{recipe_name}_id")
+    )
+    for item_id, recipe_id in links:
+        built[item_id].append(recipe_id)
+
+    cache.set_many(
+        {_key(user.id, field, generation, item_id): recipe_ids for item_id, recipe_ids in built.items()},
+        settings.RECIPE_INDEX_TIMEOUT,
+    )
+    postings.update(built)
+
+    return postings
+
+
+def recipe_ids(user, field, ids, match):
+    """Return the IDs of recipes linked to any or all of the `field` items"""
+    postings = sorted(get_postings(user, field, ids).values(), key=len)
+    if match == MATCH_ALL:
+        return reduce(set.intersection, postings[1:], set(postings[0]))
+
+    return set().union(*postings)
+
+
+def invalidate(user_id, field):
+    """Move the `field` items of a user to a new index generation"""
+    generations.bump(_generation_key(user_id, field))
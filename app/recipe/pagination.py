@@ -0,0 +1,175 @@
+"""
+Pagination for the recipe APIs
+"""
+import base64
+import binascii
+import bisect
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (cursor) pagination over the view ordering.
+
+    The last field of the ordering must be unique, so every row has a
+    stable position. Pages are fetched with a `WHERE (ordering) < (cursor)`
+    range condition, never with `COUNT(*)` or `OFFSET`. The response body
+    stays a plain list, the next page is advertised in the `Link` header.
+    """
+    cursor_query_param = "cursor"
+    cursor_query_description = _("The pagination cursor value.")
+    page_size_query_param = "page_size"
+    page_size_query_description = _("Number of results to return per page.")
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+
+        return self.page
+
+    def page_keys(self, keys, request, view):
+        """
+        Return the keys that can be on the requested page out of all the
+        matching primary keys, in page order.
+
+        Only narrows views ordered by their primary key alone, it returns
+        every key otherwise. Filtering on these `page_size + 1` keys yields
+        the same page as filtering on all of them.
+        """
+        self.ordering = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+        keys = sorted(keys)
+        if not page_size or len(self.ordering) != 1 or self.ordering[0].lstrip("-") not in ("pk", "id"):
+            return keys
+
+        position = self.decode_cursor(request)
+        descending = self.ordering[0].startswith("-")
+        if position is None:
+            end = len(keys) if descending else 0
+        else:
+            try:
+                after = int(position[0])
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            end = bisect.bisect_left(keys, after) if descending else bisect.bisect_right(keys, after)
+
+        if descending:
+            return keys[max(end - page_size - 1, 0):end][::-1]
+
+        return keys[end:end + page_size + 1]
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers["Link"] = f'<{next_link}>; rel="next"'
+
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at `max_page_size`"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        """Return the ordering the keyset is built on"""
+        return view.get_ordering()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = [self._value(self.page[-1], field) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def encode_cursor(self, position):
+        """Encode a keyset position as an opaque URL-safe token"""
+        data = json.dumps(position, separators=(",", ":")).encode()
+
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """Decode the cursor in the request, if any, to a keyset position"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def _value(self, obj, field):
+        return getattr(obj, field.lstrip("-"))
+
+    def _after(self, position):
+        """Build the condition selecting rows that come after `position`"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(self.cursor_query_description),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(self.page_size_query_description),
+                "schema": {"type": "integer"},
+            },
+        ]
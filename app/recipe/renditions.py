@@ -0,0 +1,134 @@
+"""
+Resized renditions of recipe images
+
+Renditions are generated off the request path by a small thread pool, once
+the upload transaction commits. Each rendition is re-encoded as WebP with a
+JPEG fallback and carries no EXIF data. Like the images, renditions are
+content addressed and shared by every recipe using the same image.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from core.storage import lock, recipe_image_storage
+from recipe import responses
+
+RENDITIONS = {
+    "thumbnail": (150, 150),
+    "medium": (600, 600),
+    "large": (1200, 1200),
+}
+FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the worker pool, created lazily so it is never forked"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix="image-renditions",
+            )
+
+    return _executor
+
+
+def rendition_path(name, rendition, fmt):
+    """Return the storage path of one rendition of the image `name`"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    extension = FORMATS[fmt][1]
+
+    return os.path.join(os.path.dirname(name), "renditions", stem, f"{rendition}.{extension}")
+
+
+def generate(name):
+    """Write every rendition of the image `name`, returning their paths"""
+    paths = {
+        rendition: {fmt: rendition_path(name, rendition, fmt) for fmt in FORMATS}
+        for rendition in RENDITIONS
+    }
+    if all(recipe_image_storage.exists(path) for formats in paths.values() for path in formats.values()):
+        # Renditions are content addressed like the image, another recipe made them.
+        return paths
+
+    with recipe_image_storage.open(name) as image_file:
+        with Image.open(image_file) as original:
+            image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for rendition, size in RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.Resampling.LANCZOS)
+        for fmt, (pil_format, _) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=pil_format, quality=settings.IMAGE_RENDITION_QUALITY, optimize=True)
+            recipe_image_storage.save(paths[rendition][fmt], ContentFile(buffer.getvalue()))
+
+    return paths
+
+
+def delete_files(name):
+    """Delete an image and all its renditions"""
+    for rendition in RENDITIONS:
+        for fmt in FORMATS:
+            recipe_image_storage.delete(rendition_path(name, rendition, fmt))
+    recipe_image_storage.delete(name)
+
+
+def release(name):
+    """Delete an image and its renditions once no recipe points at them"""
+    if not name:
+        return
+
+    # Saves of the same image wait until the files are gone, or this waits
+    # until the recipe they are saved for is committed.
+    with transaction.atomic():
+        lock(name)
+        if not Recipe.objects.filter(image=name).exists():
+            delete_files(name)
+
+
+def process(recipe_id, user_id, name):
+    """Generate the renditions of a recipe image and record them on the recipe"""
+    try:
+        renditions = generate(name)
+        updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_renditions=renditions,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            responses.bump(user_id)
+        else:
+            # The image was replaced or the recipe deleted meanwhile.
+            release(name)
+    except Exception:
+        logger.exception("Failed to generate renditions of %s", name)
+    finally:
+        if settings.IMAGE_RENDITIONS_ASYNC:
+            connections.close_all()
+
+
+def schedule(recipe):
+    """Generate the renditions of the recipe image once the transaction commits"""
+    args = (recipe.pk, recipe.user_id, recipe.image.name)
+    if settings.IMAGE_RENDITIONS_ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(process, *args))
+    else:
+        transaction.on_commit(lambda: process(*args))
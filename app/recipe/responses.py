@@ -0,0 +1,57 @@
+"""
+Per-user versioned cache of list responses
+
+Entries are keyed on the user, the request path and query string, the
+negotiated media type and the user's data generation. Every write to the
+user's recipes, tags or ingredients bumps the generation, which orphans all
+their entries at once; orphans simply expire.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import generations
+
+
+def _generation_key(user_id):
+    return f"api-generation:{user_id}"
+
+
+def get_generation(user_id):
+    """Return the current data generation of a user"""
+    return generations.get(_generation_key(user_id))
+
+
+def bump(user_id):
+    """Move a user to a new data generation"""
+    generations.bump(_generation_key(user_id))
+
+
+def get_key(request, generation):
+    """Return the cache key of a list response at a data generation, or None if caching is off"""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+
+    params = sorted((name, values) for name, values in request.query_params.lists())
+    parts = (request.path, params, request.accepted_media_type, generation)
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16)
+
+    return f"api-response:{request.user.pk}:{digest.hexdigest()}"
+
+
+def load(key):
+    """Return the cached (data, headers) of a response, or None"""
+    if key is None:
+        return None
+
+    return cache.get(key)
+
+
+def store(key, response):
+    """Cache the data and headers of a successful response"""
+    if key is None or response.status_code != 200:
+        return
+
+    headers = {name: response[name] for name in ("Link",) if name in response}
+    cache.set(key, (list(response.data), headers), settings.RESPONSE_CACHE_TIMEOUT)
@@ -1,47 +1,142 @@
 """
 Serializers for recipe APIs
 """
+import os
+
+from django.conf import settings
+from django.db import transaction
+
 from rest_framework import serializers
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, RecipeImageUpload, Tag, Ingredient
+from core.profiling import ProfiledSerializerMixin
+from core.storage import recipe_image_storage
+from recipe import index, responses
+from recipe.filters import get_through
+
+RELATED_MODELS = {"tags": Tag, "ingredients": Ingredient}
+
+
+def resolve_items(user, model, names):
+    """Return a `name -> item` mapping of the user's tags/ingredients, creating the missing ones in bulk"""
+    names = set(names)
+    items = {}
+    for item in model.objects.filter(user=user, name__in=names).order_by("id"):
+        items.setdefault(item.name, item)
 
+    missing = [model(user=user, name=name) for name in sorted(names - items.keys())]
+    for item in model.objects.bulk_create(missing):
+        items[item.name] = item
 
-class TagSerializer(serializers.ModelSerializer):
+    return items
+
+
+class TagSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name"]
         read_only_fields = ["id"]
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ["id", "name"]
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+    """Create many recipes with a fixed number of queries"""
+    def create(self, validated_data):
+        auth_user = self.context["request"].user
+        related = [
+            {field: attrs.pop(field, []) for field in RELATED_MODELS}
+            for attrs in validated_data
+        ]
+
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create([Recipe(**attrs) for attrs in validated_data])
+            for field, items_model in RELATED_MODELS.items():
+                items = resolve_items(
+                    auth_user,
+                    items_model,
+                    [item["name"] for links in related for item in links[field]],
+                )
+                pairs = {
+                    (recipe.id, items[item["name"]].id)
+                    for recipe, links in zip(recipes, related)
+                    for item in links[field]
+                }
+                through, recipe_name, item_name = get_through(field)
+                through.objects.bulk_create([
+                    through(**{f"{recipe_name}_id": recipe_id, f"{item_name}_id": item_id})
+                    for recipe_id, item_id in sorted(pairs)
+                ])
+                index.invalidate(auth_user.id, field)
+            responses.bump(auth_user.id)
+
+        return recipes
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """URLs of the resized renditions of a recipe image, by rendition and format"""
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for rendition, formats in value.items():
+            urls[rendition] = {}
+            for fmt, path in formats.items():
+                url = recipe_image_storage.url(path)
+                urls[rendition][fmt] = request.build_absolute_uri(url) if request else url
+
+        return urls
+
+
+class SparseFieldsMixin:
+    """Only render the fields listed in the `fields` context, if any"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get("fields")
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Recipe
-        fields = ["id", "title", "time_minutes", "price", "link", "tags", "ingredients", "image"]
+        fields = [
+            "id", "title", "time_minutes", "price", "link", "tags", "ingredients", "image",
+            "image_renditions",
+        ]
         read_only_fields = ["id"]
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_items(self, items, items_model, related_field):
-        """Generic method to get or create `tags`/`ingredients`"""
+    def _set_items(self, recipe, field, items, created=False):
+        """Link `recipe` to exactly the named `tags`/`ingredients`, writing only the changed links"""
         auth_user = self.context["request"].user
-        for item in items:
-            item_obj, created = items_model.objects.get_or_create(user=auth_user, **item)
-            getattr(related_field, "add")(item_obj)
+        resolved = resolve_items(auth_user, RELATED_MODELS[field], [item["name"] for item in items])
+        related = getattr(recipe, field)
+        wanted = {item.id for item in resolved.values()}
+        current = set() if created else set(related.values_list("id", flat=True))
+
+        if current - wanted:
+            related.remove(*(current - wanted))
+        if wanted - current:
+            related.add(*(wanted - current))
 
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_items(tags, Tag, recipe.tags)
-        self._get_or_create_items(ingredients, Ingredient, recipe.ingredients)
+        self._set_items(recipe, "tags", tags, created=True)
+        self._set_items(recipe, "ingredients", ingredients, created=True)
 
         return recipe
 
@@ -49,12 +144,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_items(tags, Tag, instance.tags)
+            self._set_items(instance, "tags", tags)
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_items(ingredients, Ingredient, instance.ingredients)
+            self._set_items(instance, "ingredients", ingredients)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -68,9 +161,32 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ["description"]
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    image_renditions = ImageRenditionsField()
+
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
+        fields = ["id", "image", "image_renditions"]
         read_only_field = ["id"]
         extra_kwargs = {"image": {"required": "True"}}
+
+
+class RecipeImageUploadSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    offset = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = RecipeImageUpload
+        fields = ["id", "filename", "size", "offset"]
+        read_only_fields = ["id"]
+        extra_kwargs = {"size": {"min_value": 1}}
+
+    def validate_filename(self, value):
+        return os.path.basename(value)
+
+    def validate_size(self, value):
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.CHUNKED_UPLOAD_MAX_SIZE}."
+            )
+
+        return value
@@ -0,0 +1,98 @@
+"""
+Signal handlers for the recipe APIs
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Recipe, RecipeImageUpload, Tag, Ingredient
+from recipe import index, renditions, responses, uploads
+
+RECIPE_FIELDS = {
+    Recipe.tags.through: "tags",
+    Recipe.ingredients.through: "ingredients",
+}
+ITEM_FIELDS = {
+    Tag: "tags",
+    Ingredient: "ingredients",
+}
+
+
+def touch_recipes(**lookup):
+    """Move the modification time of recipes whose representation changed"""
+    Recipe.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the index and touch recipes when tags/ingredients are linked or unlinked"""
+    if action.startswith("post_"):
+        responses.bump(instance.user_id)
+        index.invalidate(instance.user_id, RECIPE_FIELDS[sender])
+    if reverse:
+        if action == "pre_clear":
+            instance._cleared_recipe_ids = list(instance.recipe_set.values_list("pk", flat=True))
+        elif action == "post_clear":
+            touch_recipes(pk__in=instance.__dict__.pop("_cleared_recipe_ids", []))
+        elif action in ("post_add", "post_remove"):
+            touch_recipes(pk__in=pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        touch_recipes(pk=instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    """Move the recipe owner to a new data generation"""
+    responses.bump(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Invalidate the index of the recipe owner and release the recipe image"""
+    responses.bump(instance.user_id)
+    for field in RECIPE_FIELDS.values():
+        index.invalidate(instance.user_id, field)
+
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: renditions.release(name))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def item_saved(sender, instance, created, **kwargs):
+    """Move the modification time of recipes showing a changed tag/ingredient"""
+    responses.bump(instance.user_id)
+    if not created:
+        touch_recipes(**{ITEM_FIELDS[sender]: instance})
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def item_deleting(sender, instance, **kwargs):
+    """Move the modification time of recipes about to lose a tag/ingredient"""
+    touch_recipes(**{ITEM_FIELDS[sender]: instance})
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def item_deleted(sender, instance, **kwargs):
+    """Invalidate the index of the owner of a deleted tag/ingredient"""
+    responses.bump(instance.user_id)
+    index.invalidate(instance.user_id, ITEM_FIELDS[sender])
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    """Start a new user at a fresh data generation, in case its ID is reused"""
+    if created:
+        responses.bump(instance.pk)
+
+
+@receiver(post_delete, sender=RecipeImageUpload)
+def image_upload_deleted(sender, instance, **kwargs):
+    """Delete the part file of a finished or abandoned chunked upload"""
+    uploads.delete_part(instance)
@@ -0,0 +1,157 @@
+"""
+Tests for the tag/ingredient to recipe IDs index
+"""
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from recipe import index
+from recipe.filters import MATCH_ALL, MATCH_ANY
+from recipe.tests import utils
+
+RECIPES_URL = reverse("recipes:recipe-list")
+
+
+def recipe_query(queries):
+    """Return the SQL of the captured query selecting recipes"""
+    return next(query["sql"] for query in queries if query["sql"].startswith('SELECT "core_recipe"."id"'))
+
+
+class RecipeIndexTests(TestCase):
+    """Test the index stays in sync with recipe links"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = utils.create_user()
+        self.tag = utils.create_tag(user=self.user)
+        self.recipe = utils.create_recipe(user=self.user)
+
+    def test_build_postings(self):
+        """Test postings list the user's recipes in ID order"""
+        other = utils.create_recipe(user=self.user)
+        other.tags.add(self.tag)
+        self.recipe.tags.add(self.tag)
+
+        postings = index.get_postings(self.user, "tags", [self.tag.id])
+
+        self.assertEqual(list(postings[self.tag.id]), [self.recipe.id, other.id])
+
+    def test_postings_cached(self):
+        """Test postings are read from the cache once built"""
+        index.get_postings(self.user, "tags", [self.tag.id])
+
+        with self.assertNumQueries(0):
+            index.get_postings(self.user, "tags", [self.tag.id])
+
+    def test_link_changes_update_postings(self):
+        """Test adding, removing and clearing links update the index"""
+        index.get_postings(self.user, "tags", [self.tag.id])
+
+        self.recipe.tags.add(self.tag)
+        self.assertEqual(index.recipe_ids(self.user, "tags", [self.tag.id], MATCH_ANY), {self.recipe.id})
+
+        self.recipe.tags.remove(self.tag)
+        self.assertEqual(index.recipe_ids(self.user, "tags", [self.tag.id], MATCH_ANY), set())
+
+        self.tag.recipe_set.add(self.recipe)
+        self.assertEqual(index.recipe_ids(self.user, "tags", [self.tag.id], MATCH_ANY), {self.recipe.id})
+
+        self.recipe.tags.clear()
+        self.assertEqual(index.recipe_ids(self.user, "tags", [self.tag.id], MATCH_ANY), set())
+
+    def test_recipe_delete_updates_postings(self):
+        """Test deleting a recipe removes it from the index"""
+        self.recipe.tags.add(self.tag)
+        index.get_postings(self.user, "tags", [self.tag.id])
+
+        self.recipe.delete()
+
+        self.assertEqual(index.recipe_ids(self.user, "tags", [self.tag.id], MATCH_ANY), set())
+
+    def test_match_all_intersects_postings(self):
+        """Test match all only keeps recipes linked to every item"""
+        tag2 = utils.create_tag(user=self.user, name="Tag 2")
+        other = utils.create_recipe(user=self.user)
+        self.recipe.tags.add(self.tag, tag2)
+        other.tags.add(self.tag)
+
+        ids = index.recipe_ids(self.user, "tags", [self.tag.id, tag2.id], MATCH_ALL)
+
+        self.assertEqual(ids, {self.recipe.id})
+
+    def test_filter_with_and_without_index(self):
+        """Test the index and the SQL filters return the same recipes"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ingredient = utils.create_ingredient(user=self.user)
+        other = utils.create_recipe(user=self.user)
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(ingredient)
+        other.tags.add(self.tag)
+        params = {"tags": f"{self.tag.id}", "ingredients": f"{ingredient.id}"}
+
+        res = client.get(RECIPES_URL, params)
+        with override_settings(RECIPE_INDEX_ENABLED=False):
+            res_sql = client.get(RECIPES_URL, params)
+
+        self.assertEqual([r["id"] for r in res.data], [self.recipe.id])
+        self.assertEqual(res.data, res_sql.data)
+
+    def test_index_pages_send_page_ids(self):
+        """Test paging an indexed filter only sends the IDs of each page"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        recipes = [self.recipe] + [utils.create_recipe(user=self.user) for _ in range(6)]
+        for recipe in recipes:
+            recipe.tags.add(self.tag)
+        params = {"tags": f"{self.tag.id}", "page_size": 3}
+
+        def get_page(*args):
+            with CaptureQueriesContext(connection) as queries:
+                res = client.get(*args)
+            sent = re.search(r"IN \(([^)]*)\)", recipe_query(queries)).group(1).split(",")
+            self.assertLessEqual(len(sent), 4)
+            return res
+
+        res = get_page(RECIPES_URL, params)
+        ids = [r["id"] for r in res.data]
+        while "Link" in res:
+            res = get_page(utils.next_link(res))
+            ids.extend(r["id"] for r in res.data)
+
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    def _get_recipe_query(self, params):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(RECIPES_URL, params)
+
+        return res, recipe_query(queries)
+
+    @override_settings(RECIPE_INDEX_MAX_IDS=1)
+    def test_many_ids_use_semi_join(self):
+        """Test ID sets past the bound are filtered with a semi-join instead"""
+        other = utils.create_recipe(user=self.user)
+        self.recipe.tags.add(self.tag)
+        other.tags.add(self.tag)
+
+        res, sql = self._get_recipe_query({"tags": f"{self.tag.id}"})
+
+        self.assertIn("EXISTS", sql)
+        self.assertEqual([r["id"] for r in res.data], [other.id, self.recipe.id])
+
+    def test_search_uses_semi_join(self):
+        """Test searching filtered recipes does not send the matching IDs"""
+        self.recipe.tags.add(self.tag)
+
+        res, sql = self._get_recipe_query({"tags": f"{self.tag.id}", "search": self.recipe.title})
+
+        self.assertIn("EXISTS", sql)
+        self.assertEqual([r["id"] for r in res.data], [self.recipe.id])
@@ -15,6 +15,7 @@ from recipe.serializers import IngredientSerializer
 from recipe.tests import utils
 
 INGREDIENTS_URL = reverse("recipes:ingredient-list")
+AUTOCOMPLETE_URL = reverse("recipes:ingredient-autocomplete")
 
 
 class PublicIngredientsApiTests(TestCase):
@@ -43,7 +44,7 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL)
 
-        ingredients = Ingredient.objects.all().order_by("-name")
+        ingredients = Ingredient.objects.all().order_by("-name", "-id")
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -89,4 +90,37 @@ class PrivateIngredientsApiTests(TestCase):
 
         self.assertEqual(len(res.data), 1)
 
+    def test_autocomplete_ingredients(self):
+        """Test autocomplete matches a prefix, most used ingredients first"""
+        salt = utils.create_ingredient(user=self.user, name="Salt")
+        salmon = utils.create_ingredient(user=self.user, name="salmon")
+        utils.create_ingredient(user=self.user, name="Sugar")
+        utils.create_ingredient(user=self.user, name="Sea salt")
+        utils.create_ingredient(user=utils.create_user(email="other@example.com"), name="Salsa")
+        utils.create_recipe(user=self.user).ingredients.add(salmon)
 
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "SAL"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([i["id"] for i in res.data], [salmon.id, salt.id])
+
+    def test_autocomplete_limit(self):
+        """Test autocomplete returns at most `limit` ingredients"""
+        for i in range(3):
+            utils.create_ingredient(user=self.user, name=f"Pepper {i}")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "pep", "limit": 2})
+        res_empty = self.client.get(AUTOCOMPLETE_URL, {"q": ""})
+        res_invalid = self.client.get(AUTOCOMPLETE_URL, {"q": "pep", "limit": "x"})
+
+        self.assertEqual([i["name"] for i in res.data], ["Pepper 0", "Pepper 1"])
+        self.assertEqual(res_empty.data, [])
+        self.assertEqual(res_invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test LIKE wildcards in the prefix are matched literally"""
+        utils.create_ingredient(user=self.user, name="Flour")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "%"})
+
+        self.assertEqual(res.data, [])
@@ -2,19 +2,26 @@
 Tests for recipe APIs
 """
 from decimal import Decimal
+import hashlib
+import io
 import tempfile
 import os
 
 from PIL import Image
 
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, RecipeImageUpload, Tag, Ingredient
+from core.storage import recipe_image_storage
 
+from recipe import renditions, uploads
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 from recipe.tests import utils
 
@@ -26,11 +33,24 @@ def detail_url(recipe_id):
     return reverse("recipes:recipe-detail", args=[recipe_id])
 
 
+BULK_URL = reverse("recipes:recipe-bulk")
+
+
 def image_upload_url(recipe_id):
     """Create and return an image upload URL"""
     return reverse("recipes:recipe-upload-image", args=[recipe_id])
 
 
+def chunked_upload_url(recipe_id, upload_id=None, finalize=False):
+    """Create and return a chunked image upload URL"""
+    if upload_id is None:
+        return reverse("recipes:recipe-upload-image-chunked", args=[recipe_id])
+    if finalize:
+        return reverse("recipes:recipe-upload-image-finalize", args=[recipe_id, upload_id])
+
+    return reverse("recipes:recipe-upload-image-chunk", args=[recipe_id, upload_id])
+
+
 class PublicRecipeAPITests(TestCase):
     """Test unauthenticated recipe API access"""
 
@@ -379,6 +399,41 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_update_same_tags_no_link_writes(self):
+        """Test resending the current tags does not rewrite the links"""
+        recipe = utils.create_recipe(user=self.user)
+        tags = [utils.create_tag(user=self.user, name=f"Tag {i}") for i in range(30)]
+        recipe.tags.add(*tags)
+        payload = {"tags": [{"name": tag.name} for tag in tags]}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe.tags.count(), 30)
+        writes = [
+            q["sql"] for q in queries
+            if q["sql"].startswith(("INSERT", "DELETE")) and "core_recipe_tags" in q["sql"]
+        ]
+        self.assertEqual(writes, [])
+
+    def test_update_tags_writes_only_changes(self):
+        """Test updating tags only adds and removes the changed links"""
+        recipe = utils.create_recipe(user=self.user)
+        keep = utils.create_tag(user=self.user, name="Keep")
+        drop = utils.create_tag(user=self.user, name="Drop")
+        recipe.tags.add(keep, drop)
+        payload = {"tags": [{"name": "Keep"}, {"name": "New"}]}
+
+        res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)),
+            ["Keep", "New"],
+        )
+        self.assertEqual(sorted(t["name"] for t in res.data["tags"]), ["Keep", "New"])
+
     def test_filter_by_tags(self):
         """Test filtering recipes by tags"""
         recipe1 = utils.create_recipe(user=self.user, title="Recipe 1")
@@ -421,6 +476,359 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_tags_returns_unique_recipes(self):
+        """Test a recipe matching several filter tags is returned once"""
+        recipe = utils.create_recipe(user=self.user)
+        tag1 = utils.create_tag(user=self.user, name="Tag 1")
+        tag2 = utils.create_tag(user=self.user, name="Tag 2")
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPES_URL, {"tags": f"{tag1.id},{tag2.id}"})
+
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+    def test_filter_match_all(self):
+        """Test filtering recipes having all the given tags and ingredients"""
+        tag1 = utils.create_tag(user=self.user, name="Tag 1")
+        tag2 = utils.create_tag(user=self.user, name="Tag 2")
+        ing = utils.create_ingredient(user=self.user)
+        r1 = utils.create_recipe(user=self.user, title="Recipe 1")
+        r1.tags.add(tag1, tag2)
+        r1.ingredients.add(ing)
+        r2 = utils.create_recipe(user=self.user, title="Recipe 2")
+        r2.tags.add(tag1)
+        r2.ingredients.add(ing)
+        r3 = utils.create_recipe(user=self.user, title="Recipe 3")
+        r3.tags.add(tag1, tag2)
+
+        params = {"tags": f"{tag1.id},{tag2.id}", "ingredients": f"{ing.id}", "match": "all"}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["id"] for r in res.data], [r1.id])
+
+    def test_filter_invalid_match(self):
+        """Test an unknown match mode returns an error"""
+        res = self.client.get(RECIPES_URL, {"tags": "1", "match": "some"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes in one request"""
+        tag = utils.create_tag(user=self.user, name="Dinner")
+        payload = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "2.50",
+                "tags": [{"name": "Dinner"}, {"name": f"Tag {i}"}],
+                "ingredients": [{"name": "Salt"}],
+            }
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r["title"] for r in res.data], ["Recipe 0", "Recipe 1", "Recipe 2"])
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=self.user, name="Salt").count(), 1)
+        for recipe in recipes:
+            self.assertIn(tag, recipe.tags.all())
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_create_query_count_constant(self):
+        """Test bulk creation issues a fixed number of queries"""
+        def payload(count, offset):
+            return [
+                {
+                    "title": f"Recipe {i}",
+                    "time_minutes": 10,
+                    "price": "2.50",
+                    "tags": [{"name": f"Tag {i}"}],
+                    "ingredients": [{"name": f"Ingredient {i}"}],
+                }
+                for i in range(offset, offset + count)
+            ]
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(BULK_URL, payload(2, 0), format="json")
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(BULK_URL, payload(20, 2), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(many), len(few))
+
+    def test_bulk_create_invalid_recipe(self):
+        """Test an invalid recipe rejects the whole batch"""
+        payload = [
+            {"title": "Recipe", "time_minutes": 10, "price": "2.50"},
+            {"title": "Recipe"},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_list_recipes_paginated(self):
+        """Test recipes are paginated with a cursor in the Link header"""
+        recipes = [utils.create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["id"] for r in res.data], [recipes[4].id, recipes[3].id])
+        self.assertIn('rel="next"', res["Link"])
+
+        ids = [r["id"] for r in res.data]
+        while "Link" in res:
+            res = self.client.get(utils.next_link(res))
+            ids.extend(r["id"] for r in res.data)
+
+        self.assertEqual(ids, [r.id for r in reversed(recipes)])
+
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipes does not issue a query per recipe"""
+        def create_recipes(count):
+            for i in range(count):
+                recipe = utils.create_recipe(user=self.user)
+                recipe.tags.add(utils.create_tag(user=self.user))
+                recipe.ingredients.add(utils.create_ingredient(user=self.user))
+
+        def count_queries():
+            tag_ids = ",".join(str(tag.id) for tag in Tag.objects.filter(user=self.user))
+            ingredient_ids = ",".join(str(ing.id) for ing in Ingredient.objects.filter(user=self.user))
+            counts = []
+            for params in [{}, {"tags": tag_ids}, {"ingredients": ingredient_ids}]:
+                with CaptureQueriesContext(connection) as queries:
+                    res = self.client.get(RECIPES_URL, params)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                counts.append(len(queries))
+            return counts
+
+        create_recipes(1)
+        one_recipe = count_queries()
+        create_recipes(5)
+
+        self.assertEqual(count_queries(), one_recipe)
+
+    def test_retrieve_recipe_detail_query_count(self):
+        """Test recipe detail loads nested tags and ingredients in bulk"""
+        recipe = utils.create_recipe(user=self.user)
+        for i in range(3):
+            recipe.tags.add(utils.create_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(utils.create_ingredient(user=self.user, name=f"Ingredient {i}"))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data["tags"]), 3)
+        self.assertEqual(len(res.data["ingredients"]), 3)
+
+    def test_list_sparse_fields(self):
+        """Test listing only some fields skips the nested relations"""
+        recipe = utils.create_recipe(user=self.user)
+        recipe.tags.add(utils.create_tag(user=self.user))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {"fields": "title,price"})
+
+        self.assertEqual(res.data, [{"id": recipe.id, "title": recipe.title, "price": str(recipe.price)}])
+
+    def test_retrieve_omit_fields(self):
+        """Test omitting fields of a recipe detail"""
+        recipe = utils.create_recipe(user=self.user)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(recipe.id), {"omit": "description,tags"})
+
+        self.assertNotIn("description", res.data)
+        self.assertNotIn("tags", res.data)
+        self.assertEqual(res.data["ingredients"], [])
+
+    def test_sparse_fields_unknown(self):
+        """Test selecting an unknown field returns an error"""
+        res = self.client.get(RECIPES_URL, {"fields": "title,description"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_recipes_invalid_cursor(self):
+        """Test an invalid cursor returns an error"""
+        res = self.client.get(RECIPES_URL, {"cursor": "notacursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_recipes(self):
+        """Test searching recipes by title and description"""
+        r1 = utils.create_recipe(user=self.user, title="Thai vegetable curry", description="")
+        r2 = utils.create_recipe(user=self.user, title="Rice bowl", description="Mild curry sauce")
+        utils.create_recipe(user=self.user, title="Pancakes", description="")
+        utils.create_recipe(user=utils.create_user(email="other@example.com"), title="Curry")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry"})
+
+        self.assertEqual([r["id"] for r in res.data], [r1.id, r2.id])
+
+    def test_search_with_filters(self):
+        """Test search combines with tag filters"""
+        tag = utils.create_tag(user=self.user, name="Dinner")
+        r1 = utils.create_recipe(user=self.user, title="Chicken curry")
+        r1.tags.add(tag)
+        utils.create_recipe(user=self.user, title="Fish curry")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry", "tags": f"{tag.id}"})
+
+        self.assertEqual([r["id"] for r in res.data], [r1.id])
+
+    def test_search_paginated(self):
+        """Test paging through ranked search results keeps every match"""
+        recipes = [
+            utils.create_recipe(user=self.user, title=title)
+            for title in ["Soup", "Tomato soup", "Stew", "Pea soup", "Soup"]
+        ]
+
+        ids = []
+        res = self.client.get(RECIPES_URL, {"search": "soup", "page_size": 2})
+        ids.extend(r["id"] for r in res.data)
+        while "Link" in res:
+            res = self.client.get(utils.next_link(res))
+            ids.extend(r["id"] for r in res.data)
+
+        self.assertCountEqual(ids, [r.id for r in recipes if "oup" in r.title])
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+class ConditionalRecipeAPITests(TestCase):
+    """Test conditional GET requests of the recipe API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = utils.create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = utils.create_recipe(user=self.user)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_list_not_modified(self):
+        """Test an unchanged recipe list is answered without queries"""
+        res = self.client.get(RECIPES_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_list_etag_changes(self):
+        """Test creating, updating and deleting recipes change the list ETag"""
+        etags = {self.client.get(RECIPES_URL)["ETag"]}
+
+        other = utils.create_recipe(user=self.user)
+        etags.add(self.client.get(RECIPES_URL)["ETag"])
+        self.client.patch(detail_url(other.id), {"title": "New title"})
+        etags.add(self.client.get(RECIPES_URL)["ETag"])
+        self.recipe.delete()
+        etags.add(self.client.get(RECIPES_URL)["ETag"])
+
+        self.assertEqual(len(etags), 4)
+
+    def test_list_etag_varies_with_query(self):
+        """Test filtered and unfiltered lists have different ETags"""
+        res = self.client.get(RECIPES_URL)
+        res_page = self.client.get(RECIPES_URL, {"page_size": 1})
+
+        self.assertNotEqual(res["ETag"], res_page["ETag"])
+
+    def test_detail_not_modified(self):
+        """Test an unchanged recipe is answered from its validators"""
+        res = self.client.get(detail_url(self.recipe.id))
+
+        with self.assertNumQueries(1):
+            res_etag = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=res["ETag"])
+        res_date = self.client.get(detail_url(self.recipe.id), HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+
+        self.assertEqual(res_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_by_links(self):
+        """Test linking and renaming a tag change the recipe ETag"""
+        tag = utils.create_tag(user=self.user)
+        etag = self.client.get(detail_url(self.recipe.id))["ETag"]
+
+        self.recipe.tags.add(tag)
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        tag.name = "Renamed"
+        tag.save()
+        res_renamed = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res_renamed.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_renamed.data["tags"][0]["name"], "Renamed")
+
+        tag.delete()
+        res_deleted = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=res_renamed["ETag"])
+        self.assertEqual(res_deleted.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_deleted.data["tags"], [])
+
+
+class CachedRecipeListTests(TestCase):
+    """Test the response cache of the recipe list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = utils.create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = utils.create_recipe(user=self.user)
+
+    def test_list_cached(self):
+        """Test a repeated list request is answered without queries"""
+        utils.create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL, {"page_size": 1})
+
+        with self.assertNumQueries(0):
+            res_cached = self.client.get(RECIPES_URL, {"page_size": 1})
+            res_not_modified = self.client.get(RECIPES_URL, {"page_size": 1}, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res_cached.data, res.data)
+        self.assertEqual(res_cached["Link"], res["Link"])
+        self.assertEqual(res_cached["ETag"], res["ETag"])
+        self.assertEqual(res_not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_invalidate_cache(self):
+        """Test recipe and tag writes are visible in the next list"""
+        self.client.get(RECIPES_URL)
+
+        self.client.patch(detail_url(self.recipe.id), {"title": "New title"})
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data[0]["title"], "New title")
+
+        tag = utils.create_tag(user=self.user)
+        self.recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data[0]["tags"][0]["name"], tag.name)
+
+        tag.delete()
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data[0]["tags"], [])
+
+        self.client.post(BULK_URL, [{"title": "Bulk", "time_minutes": 5, "price": "1.00"}], format="json")
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(len(res.data), 2)
+
+    def test_cache_per_user(self):
+        """Test users never see each other cached lists"""
+        self.client.get(RECIPES_URL)
+        other = utils.create_user(email="other@example.com")
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data, [])
+
 
 class ImageUploadTests(TestCase):
     """Tests for the image upload API"""
@@ -431,7 +839,8 @@ class ImageUploadTests(TestCase):
         self.recipe = utils.create_recipe(user=self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        for recipe in Recipe.objects.exclude(image=""):
+            renditions.delete_files(recipe.image.name)
 
     def test_upload_image(self):
         """Test uploading an image to a recipe"""
@@ -448,6 +857,76 @@ class ImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    @override_settings(IMAGE_RENDITIONS_ASYNC=False)
+    def test_upload_image_renditions(self):
+        """Test uploading an image generates resized renditions without EXIF"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            img = Image.new("RGB", (2000, 1000))
+            exif = Image.Exif()
+            exif[0x010F] = "Camera maker"
+            img.save(image_file, format="JPEG", exif=exif)
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(url, {"image": image_file}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["image_renditions"], {})
+        self.recipe.refresh_from_db()
+        self.assertEqual(set(self.recipe.image_renditions), set(renditions.RENDITIONS))
+        for rendition, size in renditions.RENDITIONS.items():
+            for fmt, path in self.recipe.image_renditions[rendition].items():
+                with recipe_image_storage.open(path) as f, Image.open(f) as img:
+                    self.assertEqual(img.format, renditions.FORMATS[fmt][0])
+                    self.assertEqual(img.size, (size[0], size[1] // 2))
+                    self.assertEqual(len(img.getexif()), 0)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(res.data["image_renditions"]["thumbnail"]["webp"].endswith("thumbnail.webp"))
+
+    @override_settings(IMAGE_RENDITIONS_ASYNC=False)
+    def test_upload_same_image_shared(self):
+        """Test identical uploads share one file until no recipe uses it"""
+        other = utils.create_recipe(user=self.user)
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, format="JPEG")
+        for recipe in (self.recipe, other):
+            image_file = SimpleUploadedFile("photo.JPG", buffer.getvalue())
+            res = self.client.post(image_upload_url(recipe.id), {"image": image_file}, format="multipart")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        name = self.recipe.image.name
+        self.assertEqual(name, other.image.name)
+        digest = hashlib.sha256(buffer.getvalue()).hexdigest()
+        self.assertEqual(name, f"uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertTrue(recipe_image_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        self.assertFalse(recipe_image_storage.exists(name))
+
+    @override_settings(IMAGE_RENDITIONS_ASYNC=False)
+    def test_upload_image_releases_previous(self):
+        """Test replacing an image deletes the previous unused file"""
+        url = image_upload_url(self.recipe.id)
+        names = []
+        for color in ("red", "blue"):
+            buffer = io.BytesIO()
+            Image.new("RGB", (10, 10), color).save(buffer, format="PNG")
+            image_file = SimpleUploadedFile("photo.png", buffer.getvalue())
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(url, {"image": image_file}, format="multipart")
+            self.recipe.refresh_from_db()
+            names.append(self.recipe.image.name)
+
+        self.assertFalse(recipe_image_storage.exists(names[0]))
+        self.assertTrue(recipe_image_storage.exists(names[1]))
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image"""
         url = image_upload_url(self.recipe.id)
@@ -455,3 +934,121 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format="multipart")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChunkedImageUploadTests(TestCase):
+    """Tests for the resumable chunked image upload API"""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = utils.create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = utils.create_recipe(user=self.user)
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, format="JPEG")
+        self.content = buffer.getvalue()
+
+    def tearDown(self):
+        for upload in RecipeImageUpload.objects.all():
+            uploads.delete_part(upload)
+        self.recipe.refresh_from_db()
+        self.recipe.image.delete()
+
+    def _start(self, content):
+        res = self.client.post(
+            chunked_upload_url(self.recipe.id),
+            {"filename": "photo.jpg", "size": len(content)},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def _put(self, upload_id, chunk, offset):
+        url = f"{chunked_upload_url(self.recipe.id, upload_id)}?offset={offset}"
+        return self.client.put(url, chunk, content_type="application/octet-stream")
+
+    def test_chunked_upload(self):
+        """Test uploading an image in chunks and finalizing it"""
+        upload_id = self._start(self.content)
+        half = len(self.content) // 2
+
+        res = self._put(upload_id, self.content[:half], 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["offset"], half)
+
+        res = self.client.get(chunked_upload_url(self.recipe.id, upload_id))
+        self.assertEqual(res.data["offset"], half)
+
+        res = self._put(upload_id, self.content[half:], half)
+        self.assertEqual(res.data["offset"], len(self.content))
+
+        res = self.client.post(chunked_upload_url(self.recipe.id, upload_id, finalize=True))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open() as image_file:
+            self.assertEqual(image_file.read(), self.content)
+        self.assertFalse(RecipeImageUpload.objects.filter(pk=upload_id).exists())
+
+    def test_chunk_wrong_offset(self):
+        """Test a chunk not starting at the current offset is rejected"""
+        upload_id = self._start(self.content)
+        self._put(upload_id, self.content[:10], 0)
+
+        res = self._put(upload_id, self.content[20:30], 20)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["offset"], 10)
+
+    def test_chunk_past_size(self):
+        """Test a chunk going past the declared size is rejected"""
+        upload_id = self._start(self.content)
+
+        res = self._put(upload_id, self.content + b"extra", 0)
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_finalize_incomplete(self):
+        """Test finalizing an incomplete upload is rejected"""
+        upload_id = self._start(self.content)
+        self._put(upload_id, self.content[:10], 0)
+
+        res = self.client.post(chunked_upload_url(self.recipe.id, upload_id, finalize=True))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Recipe.objects.get(id=self.recipe.id).image)
+
+    def test_finalize_invalid_image(self):
+        """Test finalizing an upload that is not an image is rejected"""
+        content = b"notanimage"
+        upload_id = self._start(content)
+        self._put(upload_id, content, 0)
+
+        res = self.client.post(chunked_upload_url(self.recipe.id, upload_id, finalize=True))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_start_empty_upload(self):
+        """Test an upload must declare at least one byte"""
+        res = self.client.post(chunked_upload_url(self.recipe.id), {"filename": "a.jpg", "size": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("size", res.data)
+
+    def test_finalize_without_chunks(self):
+        """Test finalizing an upload that never received a chunk is rejected"""
+        upload = RecipeImageUpload.objects.create(recipe=self.recipe, filename="a.jpg", size=0)
+
+        res = self.client.post(chunked_upload_url(self.recipe.id, upload.id, finalize=True))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.get(id=self.recipe.id).image)
+
+    def test_other_users_upload_not_found(self):
+        """Test uploads of another user recipe cannot be used"""
+        other_user = utils.create_user(email="other@example.com")
+        recipe = utils.create_recipe(user=other_user)
+        upload = RecipeImageUpload.objects.create(recipe=recipe, filename="a.jpg", size=10)
+
+        res = self.client.get(chunked_upload_url(recipe.id, upload.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
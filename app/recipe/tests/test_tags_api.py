@@ -2,7 +2,7 @@
 Tests for the tags API
 """
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -14,6 +14,7 @@ from recipe.tests import utils
 
 
 TAGS_URL = reverse("recipes:tag-list")
+AUTOCOMPLETE_URL = reverse("recipes:tag-autocomplete")
 
 
 def detail_url(tag_id):
@@ -44,7 +45,7 @@ class PrivateTagsAPITests(TestCase):
         utils.create_tag(user=self.user)
 
         res = self.client.get(TAGS_URL)
-        tags = Tag.objects.all().order_by("-name")
+        tags = Tag.objects.all().order_by("-name", "-id")
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -111,3 +112,58 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_tags_paginated(self):
+        """Test paging through tags with duplicate ids keeps every tag"""
+        tags = [utils.create_tag(user=self.user, name=name) for name in ["A", "B", "B", "B", "C"]]
+
+        ids = []
+        res = self.client.get(TAGS_URL, {"page_size": 2})
+        ids.extend(t["id"] for t in res.data)
+        while "Link" in res:
+            res = self.client.get(utils.next_link(res))
+            ids.extend(t["id"] for t in res.data)
+
+        expected = [t.id for t in sorted(tags, key=lambda t: (t.name, t.id), reverse=True)]
+        self.assertEqual(ids, expected)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_tags_not_modified(self):
+        """Test an unchanged tag list answers 304 until a tag changes"""
+        tag = utils.create_tag(user=self.user)
+        etag = self.client.get(TAGS_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url(tag.id), {"name": "Renamed"})
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_assigned_tags_modified_by_links(self):
+        """Test swapping which tags are assigned changes the list ETag"""
+        tag_a = utils.create_tag(user=self.user, name="A")
+        tag_b = utils.create_tag(user=self.user, name="B")
+        tag_c = utils.create_tag(user=self.user, name="C")
+        recipe = utils.create_recipe(user=self.user)
+        recipe.tags.add(tag_a, tag_c)
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        recipe.tags.remove(tag_a)
+        recipe.tags.add(tag_b)
+        res_changed = self.client.get(TAGS_URL, {"assigned_only": 1}, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual([t["name"] for t in res_changed.data], ["C", "B"])
+
+    def test_autocomplete_tags(self):
+        """Test autocomplete matches a tag name prefix"""
+        tag = utils.create_tag(user=self.user, name="Vegan")
+        utils.create_tag(user=self.user, name="Dessert")
+
+        with self.assertNumQueries(1):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "ve"})
+
+        self.assertEqual(res.data, [{"id": tag.id, "name": "Vegan"}])
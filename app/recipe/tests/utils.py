@@ -1,7 +1,9 @@
 """
 Utils for tests
 """
+import re
 from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 
 from core.models import Ingredient, Tag, Recipe
@@ -31,3 +33,8 @@ def create_recipe(user, **params):
     defaults.update(params)
 
     return Recipe.objects.create(user=user, **defaults)
+
+
+def next_link(response):
+    """Return the next page URL advertised in a paginated response"""
+    return re.search(r'<([^>]+)>; rel="next"', response["Link"]).group(1)
@@ -0,0 +1,67 @@
+"""
+Resumable chunked uploads of recipe images
+
+An upload is started with its total size, filled by PUT requests that each
+carry the next chunk at the current offset, and finalized once complete.
+Chunks are streamed to a part file without being loaded into memory, so a
+dropped connection only loses the bytes that never arrived.
+"""
+import fcntl
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import RecipeImageUpload
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class OffsetMismatch(Exception):
+    """The chunk does not start where the received bytes end"""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+class UploadTooLarge(Exception):
+    """The chunk goes past the declared size of the upload"""
+
+
+def append(upload, stream, offset, length):
+    """Write `length` bytes from `stream` at `offset`, returning the new offset"""
+    os.makedirs(settings.CHUNKED_UPLOAD_ROOT, exist_ok=True)
+    with open(upload.path, "ab") as part:
+        fcntl.flock(part, fcntl.LOCK_EX)
+        current = part.seek(0, os.SEEK_END)
+        if offset != current:
+            raise OffsetMismatch(current)
+        if current + length > upload.size:
+            raise UploadTooLarge()
+
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                break
+            part.write(data)
+            remaining -= len(data)
+
+        return part.tell()
+
+
+def purge_expired():
+    """Delete a batch of uploads older than CHUNKED_UPLOAD_EXPIRY seconds"""
+    cutoff = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+    expired = RecipeImageUpload.objects.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:100]
+    RecipeImageUpload.objects.filter(pk__in=list(expired)).delete()
+
+
+def delete_part(upload):
+    """Delete the part file of an upload"""
+    try:
+        os.remove(upload.path)
+    except FileNotFoundError:
+        pass
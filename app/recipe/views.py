@@ -8,20 +8,91 @@ from drf_spectacular.utils import (
     OpenApiTypes
 )
 
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Recipe, Tag, Ingredient
-from recipe import serializers
+from core.models import Recipe, RecipeImageUpload, Tag, Ingredient
+from recipe import conditional, filters, index, renditions, responses, serializers, uploads
+from recipe.pagination import KeysetPagination
+from user.authentication import CachedTokenAuthentication
+
+
+UUID_PATTERN = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Only return these fields, separated by commas",
+    ),
+    OpenApiParameter(
+        "omit",
+        OpenApiTypes.STR,
+        description="Leave out these fields, separated by commas",
+    ),
+]
 
 
 class BaseViewSet(viewsets.ModelViewSet):
     """Base view set"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    detail_prefetch = ()
+
+    def get_ordering(self):
+        """Return the ordering of the listed objects"""
+        return self.ordering
+
+    def get_prefetch(self):
+        """Return the relations to prefetch for listed and retrieved objects"""
+        return self.detail_prefetch
+
+    def list(self, request, *args, **kwargs):
+        """List objects from the cache, or answer 304 if the client copy is unchanged"""
+        generation = responses.get_generation(request.user.pk)
+        etag = conditional.collection_etag(request, generation)
+        response = conditional.not_modified(request, etag)
+        if response is not None:
+            return response
+
+        cache_key = responses.get_key(request, generation)
+        cached = responses.load(cache_key)
+        if cached is not None:
+            data, headers = cached
+            return conditional.set_validators(Response(data, headers=headers), etag)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        responses.store(cache_key, response)
+
+        return conditional.set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an object, or answer 304 if the client copy is unchanged"""
+        instance = self.get_object()
+        etag = conditional.make_etag(request, instance.updated_at)
+        response = conditional.not_modified(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+
+        prefetch_related_objects([instance], *self.get_prefetch())
+        response = Response(self.get_serializer(instance).data)
+
+        return conditional.set_validators(response, etag, instance.updated_at)
 
 
 @extend_schema_view(
@@ -37,6 +108,11 @@ class BaseViewSet(viewsets.ModelViewSet):
 )
 class BaseRecipeAttrViewSet(BaseViewSet):
     """Base view set for recipe attributes"""
+    ordering = ("-name", "-id")
+    recipe_field = None
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
     def get_queryset(self):
         """Retrieve attribute for authenticated user"""
         assigned_only = bool(
@@ -44,9 +120,43 @@ class BaseRecipeAttrViewSet(BaseViewSet):
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = filters.filter_assigned(queryset, self.recipe_field)
+
+        return queryset.filter(user=self.request.user).order_by(*self.get_ordering())
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                required=True,
+                description="Case-insensitive prefix of the names to complete",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description="Maximum number of names to return",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def autocomplete(self, request):
+        """Complete a name prefix, most used items first"""
+        prefix = request.query_params.get("q", "").strip()
+        try:
+            limit = int(request.query_params.get("limit", self.autocomplete_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        if not prefix or limit <= 0:
+            return Response([])
 
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        queryset = filters.annotate_usage(
+            self.queryset.filter(user=request.user, name__istartswith=prefix),
+            self.recipe_field,
+        )
+        items = queryset.order_by("-usage", "name", "id")[:min(limit, self.autocomplete_max_limit)]
+
+        return Response(self.get_serializer(items, many=True).data)
 
 
 @extend_schema_view(
@@ -61,39 +171,134 @@ class BaseRecipeAttrViewSet(BaseViewSet):
                 "ingredients",
                 OpenApiTypes.STR,
                 description="Filter by ingredient IDs, separated by commas",
-            )
+            ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Search the title and description, ranking the best matches first",
+            ),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR, enum=filters.MATCH_CHOICES,
+                description="Match recipes having any (default) or all of the given tags and ingredients",
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
 class RecipeViewSet(BaseViewSet):
     """View for manage recipe APIs"""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
+    ordering = ("-id",)
+    detail_prefetch = ("tags", "ingredients")
+    bulk_max_size = 1000
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(",")]
 
+    def _get_match(self):
+        """Return the validated `match` mode for tag and ingredient filters"""
+        match = self.request.query_params.get("match", filters.MATCH_ANY)
+        if match not in filters.MATCH_CHOICES:
+            raise ValidationError({"match": f"Must be one of: {', '.join(filters.MATCH_CHOICES)}."})
+
+        return match
+
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
         tags = self.request.query_params.get("tags")
         ingredients = self.request.query_params.get("ingredients")
+        match = self._get_match()
         queryset = self.queryset
+        related = []
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            related.append(("tags", self._params_to_ints(tags)))
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            related.append(("ingredients", self._params_to_ints(ingredients)))
 
-        return queryset.filter(user=self.request.user).order_by("-id").distinct()
+        search = self.request.query_params.get("search", "").strip()
+        recipe_ids = None
+        # Search results are ranked by the database, which needs every match.
+        if related and settings.RECIPE_INDEX_ENABLED and not search:
+            recipe_ids = set.intersection(*(
+                index.recipe_ids(self.request.user, field, ids, match)
+                for field, ids in related
+            ))
+            if self.action == "list" and self.paginator is not None:
+                # Only send the IDs that can be on the requested page.
+                recipe_ids = self.paginator.page_keys(recipe_ids, self.request, self)
+            if len(recipe_ids) > settings.RECIPE_INDEX_MAX_IDS:
+                recipe_ids = None
+
+        if recipe_ids is not None:
+            queryset = queryset.filter(pk__in=sorted(recipe_ids))
+        else:
+            for field, ids in related:
+                queryset = filters.filter_by_related(queryset, field, ids, match)
+
+        if self.action == "list":
+            queryset = queryset.prefetch_related(*self.get_prefetch())
+
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            columns = [
+                name for name in fields
+                if Recipe._meta.get_field(name).concrete and not Recipe._meta.get_field(name).many_to_many
+            ]
+            queryset = queryset.only("updated_at", *columns)
+
+        if search:
+            queryset = filters.search(queryset, search)
+
+        return queryset.filter(user=self.request.user).order_by(*self.get_ordering())
+
+    def get_sparse_fields(self):
+        """Return the fields picked with `fields=` and `omit=` when reading, or None for all"""
+        fields = self.request.query_params.get("fields", "")
+        omit = self.request.query_params.get("omit", "")
+        if self.action not in ("list", "retrieve") or not (fields or omit):
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        selected = {name.strip() for name in fields.split(",") if name.strip()} or set(available)
+        omitted = {name.strip() for name in omit.split(",") if name.strip()}
+        unknown = (selected | omitted) - set(available)
+        if unknown:
+            raise ValidationError({
+                "fields": f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(available)}."
+            })
+
+        # The ID is always kept, it identifies the recipe and positions the page cursor.
+        return {"id"} | (selected - omitted)
+
+    def get_prefetch(self):
+        """Only prefetch the nested relations that are rendered"""
+        fields = self.get_sparse_fields()
+
+        return tuple(name for name in self.detail_prefetch if fields is None or name in fields)
+
+    def get_serializer_context(self):
+        """Pass the sparse fieldset to the serializer"""
+        return {**super().get_serializer_context(), "fields": self.get_sparse_fields()}
+
+    def get_ordering(self):
+        """Order search results by rank, and other recipes by newest first"""
+        if self.request.query_params.get("search", "").strip():
+            return ("-rank", "-id")
+
+        return self.ordering
 
     def get_serializer_class(self):
         """Return the serializer class for request"""
-        if self.action == "list":
+        if self.action in ("list", "bulk"):
             return serializers.RecipeSerializer
-        elif self.action == "upload_image":
+        elif self.action in ("upload_image", "upload_image_finalize"):
             return serializers.RecipeImageSerializer
+        elif self.action in ("upload_image_chunked", "upload_image_chunk"):
+            return serializers.RecipeImageUploadSerializer
 
         return self.serializer_class
 
@@ -101,6 +306,38 @@ class RecipeViewSet(BaseViewSet):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
+    @extend_schema(request=serializers.RecipeSerializer(many=True), responses=serializers.RecipeSerializer(many=True))
+    @action(methods=["POST"], detail=False)
+    def bulk(self, request):
+        """Create many recipes in one request"""
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.bulk_max_size,
+        )
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save(user=request.user)
+
+        created = (
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes])
+            .prefetch_related("tags", "ingredients")
+            .order_by("id")
+        )
+        data = self.get_serializer(created, many=True).data
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def _save_image(self, serializer):
+        """Save a new recipe image, render it and release the previous one"""
+        previous = serializer.instance.image.name
+        # The storage lock on the image name is held until the recipe is committed.
+        with transaction.atomic(savepoint=False):
+            recipe = serializer.save(image_renditions={})
+            renditions.schedule(recipe)
+            if previous and previous != recipe.image.name:
+                transaction.on_commit(lambda: renditions.release(previous))
+
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
         """Upload an image to recipe"""
@@ -108,20 +345,110 @@ class RecipeViewSet(BaseViewSet):
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            self._save_image(serializer)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def _get_image_upload(self, upload_id):
+        """Return a chunked image upload of the requested recipe"""
+        return get_object_or_404(RecipeImageUpload, pk=upload_id, recipe=self.get_object())
+
+    @action(methods=["POST"], detail=True, url_path="upload-image/chunked")
+    def upload_image_chunked(self, request, pk=None):
+        """Start a resumable chunked image upload"""
+        recipe = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        uploads.purge_expired()
+        serializer.save(recipe=recipe)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        methods=["PUT"],
+        parameters=[
+            OpenApiParameter(
+                "offset",
+                OpenApiTypes.INT,
+                required=True,
+                description="Byte offset of the chunk, equal to the current upload offset",
+            )
+        ],
+        request={"application/octet-stream": OpenApiTypes.BINARY},
+    )
+    @action(methods=["GET", "PUT"], detail=True, url_path=f"upload-image/chunked/(?P<upload_id>{UUID_PATTERN})")
+    def upload_image_chunk(self, request, pk=None, upload_id=None):
+        """Show the offset of a chunked upload, or append the next chunk to it"""
+        upload = self._get_image_upload(upload_id)
+        if request.method == "PUT":
+            try:
+                offset = int(request.query_params["offset"])
+                length = int(request.META["CONTENT_LENGTH"])
+            except (KeyError, ValueError):
+                return Response(
+                    {"detail": "The offset query parameter and a Content-Length header are required."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+                return Response(
+                    {"detail": f"Chunks are limited to {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes."},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+
+            try:
+                uploads.append(upload, request.stream, offset, length)
+            except uploads.OffsetMismatch as exc:
+                return Response({"offset": exc.offset}, status=status.HTTP_409_CONFLICT)
+            except uploads.UploadTooLarge:
+                return Response(
+                    {"detail": "The chunk goes past the size of the upload."},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+
+        return Response(self.get_serializer(upload).data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=None)
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path=f"upload-image/chunked/(?P<upload_id>{UUID_PATTERN})/finalize",
+    )
+    def upload_image_finalize(self, request, pk=None, upload_id=None):
+        """Validate a complete chunked upload and attach it to the recipe"""
+        upload = self._get_image_upload(upload_id)
+        if upload.offset != upload.size:
+            return Response({"offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            part = open(upload.path, "rb")
+        except FileNotFoundError:
+            return Response(
+                {"detail": "No chunk of the upload was received."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with part:
+            serializer = self.get_serializer(upload.recipe, data={"image": File(part, name=upload.filename)})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            self._save_image(serializer)
+        upload.delete()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """View for manage tag APIs"""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_field = "tags"
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """View for manage ingredient APIs"""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_field = "ingredients"
 
@@ -0,0 +1,74 @@
+"""
+Authentication for the APIs
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core import generations
+
+
+def _hash(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _owner_key(key):
+    return f"auth-token-owner:{_hash(key)}"
+
+
+def _generation_key(user_id):
+    return f"auth-user-generation:{user_id}"
+
+
+def _credentials_key(key, generation):
+    return f"auth-token:{_hash(key)}:{generation}"
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping the token lookups in the cache
+
+    The owner of a token never changes and is cached on its own. Lookups
+    are cached under the owner's generation, read before the database, so
+    a lookup racing a change to the user or a token deletion is stored
+    under an orphaned key. Only the user ID and active flag are cached,
+    the other fields of the user are loaded when first used.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = cache.get(_owner_key(key))
+        cache_key = None
+        state = None
+        if user_id is not None:
+            cache_key = _credentials_key(key, generations.get(_generation_key(user_id)))
+            state = cache.get(cache_key)
+
+        if state is None:
+            state = self.get_model().objects.filter(key=key).values_list("user_id", "user__is_active").first()
+            if state is None:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if cache_key is None:
+                # The lookup is cached once the owner's generation can be read before it.
+                cache.set(_owner_key(key), state[0], settings.AUTH_TOKEN_CACHE_TIMEOUT)
+            else:
+                cache.set(cache_key, state, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        user_id, is_active = state
+        if not is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        User = get_user_model()
+        user = User.from_db(User.objects.db, ["id", "is_active"], [user_id, is_active])
+
+        return (user, self.get_model()(key=key, user=user))
+
+
+def invalidate_user(user_id):
+    """Drop the cached token lookups of a user"""
+    generations.bump(_generation_key(user_id))
@@ -6,8 +6,10 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from core.profiling import ProfiledSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ["email", "password", "name"]
@@ -0,0 +1,23 @@
+"""
+Signal handlers for the user API
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user import authentication
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """Drop cached credentials when a user is changed, deactivated or deleted"""
+    authentication.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Drop cached credentials when a token is deleted"""
+    authentication.invalidate_user(instance.user_id)
@@ -0,0 +1,116 @@
+"""
+Tests for the cached token authentication
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import CachedTokenAuthentication
+
+ME_URL = reverse("users:me")
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="test@example.com",
+            password="password",
+            name="Test Name",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_cached(self):
+        """Test token lookups are cached from the second one on"""
+        authentication = CachedTokenAuthentication()
+        with self.assertNumQueries(1):
+            authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(1):
+            authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_password_not_cached(self):
+        """Test the cached user only has its ID and active flag loaded"""
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+        authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, _ = authentication.authenticate_credentials(self.token.key)
+
+        self.assertIn("password", user.get_deferred_fields())
+
+    def test_deactivated_during_lookup_rejected(self):
+        """Test a lookup racing a deactivation is not served from the cache"""
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+        first = QuerySet.first
+
+        def deactivate_after_read(queryset):
+            state = first(queryset)
+            self.user.is_active = False
+            self.user.save()
+            return state
+
+        with patch.object(QuerySet, "first", deactivate_after_read):
+            authentication.authenticate_credentials(self.token.key)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached lookup"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates the cached lookup"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_user_refreshed(self):
+        """Test changing a user refreshes the cached user"""
+        self.client.get(ME_URL)
+
+        self.user.name = "New Name"
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "New Name")
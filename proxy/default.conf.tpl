@@ -1,13 +1,73 @@
+# Pool of idle HTTP/1.1 connections to uwsgi, reused across requests
+# instead of opening one connection per request.
+upstream app {
+    server ${APP_HOST}:${APP_PORT};
+    keepalive ${UPSTREAM_KEEPALIVE};
+    keepalive_requests ${UPSTREAM_KEEPALIVE_REQUESTS};
+    keepalive_timeout ${UPSTREAM_KEEPALIVE_TIMEOUT};
+}
+
 server {
     listen ${LISTEN_PORT};
 
+    sendfile    on;
+    tcp_nopush  on;
+
+    # Compress API responses and text assets. ETags of compressed responses
+    # are weakened by nginx, which Django still matches on If-None-Match.
+    gzip              ${GZIP};
+    gzip_comp_level   ${GZIP_COMP_LEVEL};
+    gzip_min_length   ${GZIP_MIN_LENGTH};
+    gzip_proxied      any;
+    gzip_vary         on;
+    gzip_types        application/json application/msgpack application/vnd.oai.openapi
+                      application/vnd.oai.openapi+json application/javascript text/css
+                      text/plain image/svg+xml;
+
+    # Keep descriptors and metadata of frequently served files open.
+    open_file_cache          max=${OPEN_FILE_CACHE_MAX} inactive=${OPEN_FILE_CACHE_INACTIVE};
+    open_file_cache_valid    ${OPEN_FILE_CACHE_VALID};
+    open_file_cache_min_uses 2;
+    open_file_cache_errors   on;
+
+    proxy_http_version 1.1;
+    proxy_set_header   Connection "";
+    proxy_set_header   Host $http_host;
+    proxy_set_header   X-Forwarded-For $proxy_add_x_forwarded_for;
+    proxy_set_header   X-Forwarded-Proto $scheme;
+
     location /static {
         alias /vol/static;
+        add_header Cache-Control "public, max-age=${STATIC_MAX_AGE}";
+    }
+
+    # Collected static files with a content hash in their name never change.
+    location ~ ^/static/static/(?<asset>.+\.[0-9a-f]{12}\.[A-Za-z0-9]+)$ {
+        alias /vol/static/static/$asset;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    location /static/chunks/ {
+        return 404;
+    }
+
+    # Recipe images and renditions are named after their content and never
+    # change, so clients and caches can keep them forever.
+    location /static/media/uploads/recipe/ {
+        alias /vol/static/media/uploads/recipe/;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    # Chunked image uploads: nginx buffers each small chunk before handing
+    # it to uwsgi, so slow clients never hold a worker.
+    location ~ ^/api/recipes/recipes/[0-9]+/upload-image/chunked/ {
+        proxy_pass              http://app;
+        client_max_body_size    1M;
+        client_body_buffer_size 1M;
     }
 
     location / {
-        uwsgi_pass              ${APP_HOST}:${APP_PORT};
-        include                 /etc/nginx/uwsgi_params;
+        proxy_pass              http://app;
         client_max_body_size    10M;
     }
-}
\ No newline at end of file
+}
@@ -2,5 +2,11 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
-nginx -g 'daemon off;'
\ No newline at end of file
+# Only substitute our own variables, nginx variables such as $host stay as is.
+envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT}
+          ${UPSTREAM_KEEPALIVE} ${UPSTREAM_KEEPALIVE_REQUESTS} ${UPSTREAM_KEEPALIVE_TIMEOUT}
+          ${GZIP} ${GZIP_COMP_LEVEL} ${GZIP_MIN_LENGTH}
+          ${OPEN_FILE_CACHE_MAX} ${OPEN_FILE_CACHE_INACTIVE} ${OPEN_FILE_CACHE_VALID}
+          ${STATIC_MAX_AGE}' \
+    < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+nginx -g 'daemon off;'
@@ -2,8 +2,30 @@
 
 set -e
 
-python3 manage.py wait_for_db
-python3 manage.py collectstatic --noinput
-python3 manage.py migrate
+# Fast boot skips collectstatic and migrate when they have nothing to do.
+if [ "${FAST_BOOT:-1}" = "1" ]; then
+    python3 manage.py boot
+else
+    python3 manage.py wait_for_db
+    python3 manage.py collectstatic --noinput
+    python3 manage.py migrate
+fi
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Server profile defaults, derived from the CPUs available to the container.
+CPUS=$(nproc)
+SOMAXCONN=$(cat /proc/sys/net/core/somaxconn 2>/dev/null || echo 128)
+
+export WEB_WORKERS=${WEB_WORKERS:-$((CPUS * 2 + 1))}
+export WEB_THREADS=${WEB_THREADS:-2}
+export WEB_CHEAPER=${WEB_CHEAPER:-$(( WEB_WORKERS > 1 ? (WEB_WORKERS + 3) / 4 : 0 ))}
+export WEB_CHEAPER_INITIAL=${WEB_CHEAPER_INITIAL:-$(( (WEB_WORKERS + 1) / 2 ))}
+export WEB_CHEAPER_STEP=${WEB_CHEAPER_STEP:-1}
+export WEB_CHEAPER_OVERLOAD=${WEB_CHEAPER_OVERLOAD:-5}
+export WEB_BACKLOG_ALERT=${WEB_BACKLOG_ALERT:-16}
+export WEB_MAX_REQUESTS=${WEB_MAX_REQUESTS:-5000}
+export WEB_MAX_LIFETIME=${WEB_MAX_LIFETIME:-3600}
+export WEB_RELOAD_ON_RSS=${WEB_RELOAD_ON_RSS:-512}
+export WEB_LISTEN=${WEB_LISTEN:-$(( SOMAXCONN < 1024 ? SOMAXCONN : 1024 ))}
+export WEB_HARAKIRI=${WEB_HARAKIRI:-30}
+
+uwsgi --ini /scripts/uwsgi.ini